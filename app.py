@@ -9,8 +9,13 @@ import os
 
 import streamlit as st
 import uuid
-from core.research_agent import ResearchAgent
+from core.env import load_env
+load_env()
+
+# core.research_agent (langgraph, langchain_openai) is imported by the first research step, not on every rerun
 from core.document_generator import Generator
+from core.jobs import DONE, JobRejected, get_job_executor
+from core.run_control import cancel_run, peek_run_control
 # nest_asyncio no longer needed
 
 # Page Configuration
@@ -125,6 +130,12 @@ if "final_report" not in st.session_state:
     st.session_state.final_report = None
 if "agent_graph" not in st.session_state:
     st.session_state.agent_graph = None
+if "session_id" not in st.session_state:
+    st.session_state.session_id = str(uuid.uuid4())
+if "job_id" not in st.session_state:
+    st.session_state.job_id = None
+if "refine_feedback" not in st.session_state:
+    st.session_state.refine_feedback = None
     
 # --- Sidebar Configuration ---
 with st.sidebar:
@@ -132,7 +143,8 @@ with st.sidebar:
     
     with st.container():
         topic = st.text_input("Research Topic", "The Future of AI Agents")
-        max_analysts = st.slider("Number of Analysts", min_value=1, max_value=5, value=2)
+        # Raise MAX_ANALYSTS together with INTERVIEW_MAX_IN_FLIGHT for large fan-out runs
+        max_analysts = st.slider("Number of Analysts", min_value=1, max_value=int(os.environ.get("MAX_ANALYSTS", 5)), value=2)
         template_prompt = st.text_area("Custom Instructions", height=150, 
                                       placeholder="Optional: Provide specific focus areas or guidelines for the research team.")
     
@@ -144,77 +156,78 @@ with st.sidebar:
         st.session_state.final_report = None
         st.session_state.analysts = None
         st.session_state.agent_graph = None # Reset graph
+        st.session_state.job_id = None # Stop polling any previous job
         st.session_state.thread_id = str(uuid.uuid4()) # New thread
         st.rerun()
 
+    queue_stats = get_job_executor().stats()
+    st.caption(f"Research queue: {queue_stats['running']} running, {queue_stats['queued']} waiting")
+
 
 # --- Main Logic ---
 
 st.title("DeepResearch – LangGraph Based Multi-Agent Research Engine")
 
-# Function to run the agent steps synchronously
-def run_research_step(initial=False, feedback=None):
-    thread = {"configurable": {"thread_id": st.session_state.thread_id}}
-    
+# Research steps run on the process-wide job executor so this script run never blocks on the graph
+def run_research_step(thread_id, agent_graph=None, initial=False, feedback=None,
+                      topic=None, max_analysts=None, instructions=None):
+    """ Executes in a worker thread: no Streamlit calls in here """
+    thread = {"configurable": {"thread_id": thread_id}}
+
+    if initial:
+        from core.research_agent import ResearchAgent
+
+        agent_graph = ResearchAgent(instructions).build()
+        result = agent_graph.invoke({
+            "topic": topic,
+            "max_analysts": max_analysts,
+        }, thread)
+        return agent_graph, result
+
+    # feedback=None explicitly means "no feedback": proceed with the current analysts
+    agent_graph.update_state(
+        thread,
+        {"human_analyst_feedback": feedback},
+        as_node="human_feedback"
+    )
+    result = agent_graph.invoke(None, thread)
+    return agent_graph, result
+
+
+def submit_research_step(**kwargs):
     try:
-        if initial:
-            # Import default template if custom one is not provided
-            if not template_prompt:
-                from core.prompts import template as default_template
-                instructions = default_template
-            else:
-                instructions = template_prompt
-            
-            # Build graph
-            agent_graph = ResearchAgent(instructions).build()
-            st.session_state.agent_graph = agent_graph
-            
-            # Initial invoke
-            result = agent_graph.invoke({
-                "topic": topic,
-                "max_analysts": max_analysts,
-            }, thread)
-            
-            return result
-        
-        elif feedback is not None:
-            agent_graph = st.session_state.agent_graph
-            
-            # Update State with feedback
-            agent_graph.update_state(
-                thread, 
-                {"human_analyst_feedback": feedback}, 
-                as_node="human_feedback"
-            )
-            
-            result = agent_graph.invoke(None, thread)
-            return result
-            
-        else:
-            # Proceed without feedback (if empty)
-            agent_graph = st.session_state.agent_graph
-            agent_graph.update_state(
-                 thread,
-                 {"human_analyst_feedback": None}, # Explicitly None for "no feedback"
-                 as_node="human_feedback"
-            )
-            result = agent_graph.invoke(None, thread)
-            return result
-            
-    except Exception as e:
-        st.error(f"Error during research execution: {e}")
-        st.exception(e)
+        job = get_job_executor().submit(st.session_state.session_id, run_research_step,
+                                        st.session_state.thread_id, **kwargs)
+    except JobRejected as e:
+        st.warning(str(e))
+        return False
+    st.session_state.job_id = job.job_id
+    return True
+
+
+def poll_research_job(status):
+    """ Returns the finished job; while it is still pending, waits briefly and reruns the script """
+    executor = get_job_executor()
+    job = executor.get(st.session_state.job_id)
+    if job is None:
+        st.session_state.job_id = None
         return None
 
+    if not job.finished:
+        if job.status == "queued":
+            status.update(label=f"Queued – {executor.position(job.job_id)} job(s) ahead")
+        if not job.wait(timeout=1.0):
+            st.rerun()
 
+    st.session_state.job_id = None
+    if job.error is not None:
+        st.error(f"Error during research execution: {job.error}")
+        st.exception(job.error)
+    return job
 
-# No longer needed: run_async helper
 
 # --- Application Flow ---
 
-from dotenv import load_dotenv
-load_dotenv()
-
 if not st.session_state.research_active:
     st.markdown("""
     Welcome to DeepResearch. 
@@ -234,10 +247,31 @@ else:
                 st.write("Analyzing research topic...")
                 st.write("Selecting domain experts...")
                 
-                # Run the initial step
-                result = run_research_step(initial=True)
+                # Queue the initial step, then poll it across reruns
+                if st.session_state.job_id is None and st.session_state.refine_feedback:
+                    # Revising a finished report: unchanged analysts keep their interviews
+                    refine_feedback, st.session_state.refine_feedback = st.session_state.refine_feedback, None
+                    if not submit_research_step(feedback=refine_feedback, agent_graph=st.session_state.agent_graph):
+                        status.update(label="Initialization Failed", state="error")
+                        st.stop()
+                elif st.session_state.job_id is None:
+                    # Import default template if custom one is not provided
+                    if not template_prompt:
+                        from core.prompts import template as default_template
+                        instructions = default_template
+                    else:
+                        instructions = template_prompt
+
+                    if not submit_research_step(initial=True, topic=topic, max_analysts=max_analysts,
+                                                instructions=instructions):
+                        status.update(label="Initialization Failed", state="error")
+                        st.stop()
+
+                job = poll_research_job(status)
                 
-                if result:
+                if job is not None and job.status == DONE:
+                    agent_graph, result = job.result
+                    st.session_state.agent_graph = agent_graph
                     # Check if we are paused at human_feedback
                     analysts_data = result.get('analysts', [])
                     if analysts_data:
@@ -254,11 +288,12 @@ else:
         st.subheader("Research Team")
         st.markdown("The following analysts have been selected to research your topic. You may provide guidance to refine their focus.")
         
-        # Display Analysts in a grid
-        cols = st.columns(len(st.session_state.analysts))
+        # Display Analysts in a grid, five per row
+        analysts = st.session_state.analysts
+        cells = [cell for start in range(0, len(analysts), 5) for cell in st.columns(min(5, len(analysts) - start))]
         
-        for i, analyst in enumerate(st.session_state.analysts):
-            with cols[i]:
+        for i, analyst in enumerate(analysts):
+            with cells[i]:
                 st.markdown(f"""
                 <div class="analyst-card">
                     <div class="analyst-name" style="color: #2E74B5; font-size: 1.1rem; border-bottom: 2px solid #f0f0f0; padding-bottom: 0.5rem; margin-bottom: 1rem;">{analyst.role}</div>
@@ -268,35 +303,50 @@ else:
         
         st.markdown("<br>", unsafe_allow_html=True)
         
-        # Feedback Form
-        with st.form("feedback_form"):
-            st.subheader("Analyst Guidance")
-            feedback = st.text_area("Guidance", label_visibility="collapsed",
-                                   placeholder="Enter feedback or specific questions for the analysts...",
-                                   help="Leave empty to proceed with the current research plan.")
-            
-            col1, col2 = st.columns([1, 5])
-            with col1:
-                submitted = st.form_submit_button("Proceed")
-            
-            if submitted:
-                feedback_val = feedback if feedback.strip() else None
+        if st.session_state.job_id is None:
+            # Feedback Form
+            with st.form("feedback_form"):
+                st.subheader("Analyst Guidance")
+                feedback = st.text_area("Guidance", label_visibility="collapsed",
+                                       placeholder="Enter feedback or specific questions for the analysts...",
+                                       help="Leave empty to proceed with the current research plan.")
+                
+                col1, col2 = st.columns([1, 5])
+                with col1:
+                    submitted = st.form_submit_button("Proceed")
                 
-                with st.status(" conducting research...", expanded=True) as status:
-                    st.write(" conducting interviews with experts...")
-                    st.write(" gathering external resources...")
-                    st.write(" synthesizing findings...")
-                    st.write(" compiling final report...")
-                    
-                    # Run the final step
-                    result = run_research_step(feedback=feedback_val)
-                    
-                    if result:
-                        st.session_state.final_report = result.get("final_report", "No report generated.")
-                        status.update(label="Research Complete", state="complete", expanded=False)
+                if submitted:
+                    feedback_val = feedback if feedback.strip() else None
+                    if submit_research_step(feedback=feedback_val, agent_graph=st.session_state.agent_graph):
                         st.rerun()
-                    else:
-                        status.update(label="Research Failed", state="error")
+        else:
+            if st.button("Stop and write partial report"):
+                cancel_run(st.session_state.thread_id, "stopped by user")
+            with st.status(" conducting research...", expanded=True) as status:
+                st.write(" conducting interviews with experts...")
+                st.write(" gathering external resources...")
+                st.write(" synthesizing findings...")
+                st.write(" compiling final report...")
+
+                control = peek_run_control(st.session_state.thread_id)
+                if control is not None:
+                    ledger = control.ledger.snapshot()
+                    budget = f" of {ledger['budget']:,}" if ledger["budget"] else ""
+                    st.caption(f"Tokens used: {ledger['spent']:,}{budget}")
+                    st.table([{"bucket": name, "tokens": b["total_tokens"], "calls": b["calls"], "turns": b["turns"],
+                               "novelty": ", ".join(f"{n:.2f}" for n in b["novelty"])}
+                              for name, b in ledger["buckets"].items()])
+                
+                # Poll the queued research step
+                job = poll_research_job(status)
+                
+                if job is not None and job.status == DONE:
+                    _, result = job.result
+                    st.session_state.final_report = result.get("final_report", "No report generated.")
+                    status.update(label="Research Complete", state="complete", expanded=False)
+                    st.rerun()
+                else:
+                    status.update(label="Research Failed", state="error")
 
 
 if st.session_state.final_report:
@@ -357,3 +407,14 @@ if st.session_state.final_report:
                         )
     except Exception as e:
         st.error(f"Error generating documents: {e}")
+
+    st.subheader("Refine the Research Team")
+    with st.form("refine_form"):
+        refine = st.text_area("Refinement", label_visibility="collapsed",
+                              placeholder="e.g. Replace the market analyst with a regulatory specialist...",
+                              help="Only new or changed analysts are interviewed again; the report is rewritten from all sections.")
+        if st.form_submit_button("Refine") and refine.strip():
+            st.session_state.refine_feedback = refine.strip()
+            st.session_state.final_report = None
+            st.session_state.analysts = None
+            st.rerun()
@@ -0,0 +1,178 @@
+"""
+Record/replay of LLM and search I/O, one gzipped JSONL cassette per run.
+
+    CASSETTE_MODE=record   log every model call and retrieval (request, response, timing)
+    CASSETTE_MODE=replay   serve them back offline; CASSETTE_REPLAY_LATENCY=real sleeps the
+                           recorded durations, "fast" (default) returns immediately
+
+    python -m core.cassette summary cassettes/<thread_id>.jsonl.gz
+"""
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Optional
+
+from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMiss(LookupError):
+    """ Replay found no recorded response for a call (not retried by RetryPolicy) """
+
+
+class ReplayedFailure(Exception):
+    """ A call that failed while recording fails the same way on replay (and is retried the same way) """
+
+
+def _encode(value):
+    if isinstance(value, BaseMessage):
+        return {"__message__": message_to_dict(value)}
+    if isinstance(value, Document):
+        return {"__document__": {"page_content": value.page_content, "metadata": value.metadata}}
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if "__message__" in value:
+            return messages_from_dict([value["__message__"]])[0]
+        if "__document__" in value:
+            return Document(**value["__document__"])
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+def request_key(kind: str, node: str, request) -> str:
+    payload = json.dumps(_encode(request), sort_keys=True, default=str)
+    return hashlib.sha1(f"{kind}\x1f{node}\x1f{payload}".encode("utf-8")).hexdigest()[:16]
+
+
+class Cassette:
+    """
+    Replay matches on the exact request first, then falls back to the next unused
+    entry for the same node, so small prompt drift (e.g. parallel branches finishing
+    in a different order) does not break a replay.
+    """
+
+    def __init__(self, path: str, mode: str, latency: str = "fast"):
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._started = time.monotonic()
+        self._by_key = defaultdict(deque)
+        self._by_node = defaultdict(deque)
+        self._used = set()
+        if mode == REPLAY:
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # A run resumed in another process appends to the same cassette
+            if os.path.exists(path):
+                self._seq = sum(1 for _ in iter_entries(path))
+
+    @classmethod
+    def from_env(cls, thread_id: str) -> Optional["Cassette"]:
+        mode = os.environ.get("CASSETTE_MODE", "").lower()
+        if mode not in (RECORD, REPLAY):
+            return None
+        path = os.path.join(os.environ.get("CASSETTE_DIR", "cassettes"), f"{thread_id}.jsonl.gz")
+        if mode == REPLAY:
+            path = os.environ.get("CASSETTE_REPLAY") or path
+        return cls(path, mode, latency=os.environ.get("CASSETTE_REPLAY_LATENCY", "fast"))
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"No cassette to replay at {self.path}")
+        for entry in iter_entries(self.path):
+            self._by_key[entry["key"]].append(entry)
+            self._by_node[(entry["kind"], entry["node"])].append(entry)
+
+    def _take(self, queue: deque):
+        while queue:
+            entry = queue.popleft()
+            if entry["seq"] not in self._used:
+                self._used.add(entry["seq"])
+                return entry
+        return None
+
+    def call(self, kind: str, node: str, request, fn):
+        """ Record `fn()` under (kind, node, request), or serve the recorded response in replay mode """
+        key = request_key(kind, node, request)
+        if self.mode == REPLAY:
+            with self._lock:
+                entry = self._take(self._by_key[key]) or self._take(self._by_node[(kind, node)])
+            if entry is None:
+                raise CassetteMiss(f"No recorded {kind} call for node {node} in {self.path}")
+            if self.latency == "real":
+                time.sleep(entry["elapsed"])
+            if "error" in entry:
+                raise ReplayedFailure(entry["error"])
+            return _decode(entry["response"])
+
+        start = time.monotonic()
+        entry = {"kind": kind, "node": node, "key": key, "t": round(start - self._started, 4), "request": _encode(request)}
+        try:
+            response = fn()
+            entry["response"] = _encode(response)
+            return response
+        except Exception as e:
+            entry["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            entry["elapsed"] = round(time.monotonic() - start, 4)
+            self._write(entry)
+
+    def wrap(self, kind: str, node: str, fn):
+        """ `fn(query)` routed through the cassette, for RunControl.map over search queries """
+        return lambda query: self.call(kind, node, {"query": query}, lambda: fn(query))
+
+    def _write(self, entry: dict):
+        with self._lock:
+            entry["seq"] = self._seq
+            self._seq += 1
+            # One gzip member per entry: the file stays readable even if the process dies mid-run
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+
+
+def iter_entries(path: str):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def summary(path: str):
+    """ Per-node call counts and latency, in recording order """
+    stats = {}
+    for entry in iter_entries(path):
+        s = stats.setdefault((entry["kind"], entry["node"]), {"calls": 0, "errors": 0, "total": 0.0, "max": 0.0})
+        s["calls"] += 1
+        s["errors"] += "error" in entry
+        s["total"] += entry["elapsed"]
+        s["max"] = max(s["max"], entry["elapsed"])
+    print(f"{'kind':<7} {'node':<26} {'calls':>5} {'errors':>6} {'mean s':>8} {'max s':>8} {'total s':>8}")
+    for (kind, node), s in stats.items():
+        print(f"{kind:<7} {node:<26} {s['calls']:>5} {s['errors']:>6} {s['total'] / s['calls']:>8.3f} {s['max']:>8.3f} {s['total']:>8.3f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "summary":
+        sys.exit("usage: python -m core.cassette summary <cassette.jsonl.gz>")
+    summary(sys.argv[2])
@@ -1,22 +1,22 @@
-import markdown
 import re
-from docx import Document
-from pptx import Presentation
-from pptx.enum.text import PP_ALIGN
-from pptx.dml.color import RGBColor
-from docx2pdf import convert
-from pptx.util import Inches, Pt
-from markdown import markdown
-from bs4 import BeautifulSoup
+
+from .profiling import profile_call
+
+# Export libraries are imported inside the methods that use them, so importing the
+# generator (on every Streamlit rerun and service worker start) stays cheap.
 
 class Generator:
-    def __init__(self):
+    def __init__(self, output_dir="Document"):
         # self.content = content
-        self.docx_path = "Document/Report.docx"
-        self.pdf_path = "Document/Report.pdf"
-        self.pptx_path = "Document/Report.pptx"
+        self.docx_path = f"{output_dir}/Report.docx"
+        self.pdf_path = f"{output_dir}/Report.pdf"
+        self.pptx_path = f"{output_dir}/Report.pptx"
 
+    @profile_call("generate_doc")
     def generate_doc(self, content):
+        from docx import Document
+        from markdown import markdown
+
         html = markdown(content)
         plain_text = re.sub('<[^<]+?>', '', html)
 
@@ -31,8 +31,11 @@ class Generator:
         print("✅ DOCX saved!")
         
 
+    @profile_call("generate_pdf")
     def generate_pdf(self, content):
         import pythoncom
+        from docx2pdf import convert
+
         pythoncom.CoInitialize()
         try:
             self.generate_doc(content=content)
@@ -42,7 +45,15 @@ class Generator:
         return self.pdf_path
         print("✅ PDF created!")
 
+    @profile_call("generate_pptx")
     def generate_pptx(self, content):
+        from bs4 import BeautifulSoup
+        from markdown import markdown
+        from pptx import Presentation
+        from pptx.dml.color import RGBColor
+        from pptx.enum.text import PP_ALIGN
+        from pptx.util import Inches, Pt
+
         html = markdown(content)
         soup = BeautifulSoup(html, "html.parser")
 
@@ -0,0 +1,17 @@
+import os
+
+_loaded = False
+
+
+def load_env():
+    """
+    Load .env into the environment once per process. Entry points call this before
+    importing core modules, several of which read their settings at import time.
+    """
+    global _loaded
+    if _loaded:
+        return
+    from dotenv import load_dotenv
+
+    load_dotenv(os.environ.get("DOTENV_PATH") or None)
+    _loaded = True
@@ -0,0 +1,135 @@
+"""
+Shared evidence pool: a run-scoped blackboard of everything the run's interviews retrieved.
+
+    EVIDENCE_POOL=1
+
+Every search result lands in the pool's in-memory BM25 index. A later search (by any
+analyst) whose query is already covered by EVIDENCE_MIN_PASSAGES results from the same
+backend, each matching EVIDENCE_COVERAGE of the query terms, is answered from the pool
+instead of the backend, and `generate_answer` adds the EVIDENCE_ANSWER_PASSAGES most
+relevant results other analysts found to its context. The pool lives on the run's
+RunControl, so it is shared by the threads of one process, not by queue workers elsewhere.
+"""
+import math
+import os
+import threading
+from collections import Counter, defaultdict
+from typing import Iterable, List, Optional
+
+from .sources import source_id
+from .text_scoring import result_text, tokenize
+
+
+def describe(result) -> Optional[dict]:
+    """ {"url", "title", "page", "content"} of a web, Wikipedia or local corpus result """
+    if isinstance(result, dict) and "content" in result and ("url" in result or "source" in result):
+        return {"url": result.get("url") or result["source"], "title": result.get("title", ""), "page": "",
+                "content": result["content"]}
+    if hasattr(result, "page_content") and hasattr(result, "metadata"):
+        return {"url": result.metadata.get("source", "Wikipedia"), "title": result.metadata.get("title", "Wikipedia"),
+                "page": result.metadata.get("page", ""), "content": result.page_content}
+    return None
+
+
+class EvidencePool:
+    """ Incremental BM25 inverted index over one run's search results; safe to share across threads """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.enabled = os.environ.get("EVIDENCE_POOL", "0") == "1"
+        self.min_passages = int(os.environ.get("EVIDENCE_MIN_PASSAGES", 3))
+        self.coverage = float(os.environ.get("EVIDENCE_COVERAGE", 0.6))
+        self.answer_passages = int(os.environ.get("EVIDENCE_ANSWER_PASSAGES", 3))
+        self.k1, self.b = k1, b
+        self._lock = threading.Lock()
+        self._entries = []
+        self._seen = set()
+        self._postings = defaultdict(dict)
+        self._total_length = 0
+        self._batch = {}
+        self._stats = Counter()
+
+    def add(self, node: str, results: list):
+        """ Index `node`'s results; ones already in the pool are skipped """
+        if not isinstance(results, list):
+            return
+        with self._lock:
+            self._batch[node] = max(self._batch.get(node, 0), len(results))
+        for result in results:
+            described = describe(result)
+            if described is None:
+                continue
+            terms = Counter(tokenize(result_text(result)))
+            key = (node, source_id(described["url"], described["page"]), described["content"])
+            with self._lock:
+                if not terms or key in self._seen:
+                    continue
+                self._seen.add(key)
+                index = len(self._entries)
+                length = sum(terms.values())
+                self._entries.append({"node": node, "sid": key[1], "result": result, "described": described,
+                                      "terms": set(terms), "length": length})
+                for term, tf in terms.items():
+                    self._postings[term][index] = tf
+                self._total_length += length
+                self._stats["results_pooled"] += 1
+
+    def search(self, query: str, k: int = 3, node: Optional[str] = None, exclude: Iterable[str] = ()) -> List[dict]:
+        """ Top-`k` entries for `query` (only `node`'s, if given), skipping citation IDs in `exclude` """
+        terms = set(tokenize(query))
+        exclude = set(exclude)
+        with self._lock:
+            n = len(self._entries)
+            if not n or not terms:
+                return []
+            avgdl = self._total_length / n
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term, {})
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for index, tf in postings.items():
+                    norm = 1 - self.b + self.b * self._entries[index]["length"] / avgdl
+                    scores[index] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+            hits = []
+            for index in sorted(scores, key=scores.get, reverse=True):
+                entry = self._entries[index]
+                if entry["sid"] in exclude or (node is not None and entry["node"] != node):
+                    continue
+                hits.append({**entry, "coverage": len(terms & entry["terms"]) / len(terms)})
+                if len(hits) >= k:
+                    break
+        return hits
+
+    def covering(self, node: str, query: str) -> Optional[list]:
+        """
+        Pooled `node` results that make a new search for `query` redundant, or None. A backend
+        that returns fewer than `min_passages` results per query only needs as many as it returns
+        """
+        limit = max(self.min_passages, 3)
+        with self._lock:
+            needed = min(self.min_passages, self._batch.get(node, 0))
+        covered = [hit for hit in self.search(query, k=limit * 2, node=node) if hit["coverage"] >= self.coverage]
+        if not needed or len(covered) < needed:
+            return None
+        return [hit["result"] for hit in covered[:limit]]
+
+    def wrap(self, node: str, fn):
+        """ `fn(query)` answered from the pool when it covers the query, otherwise called and pooled """
+        def search(query):
+            pooled = self.covering(node, query)
+            if pooled is not None:
+                self.count("searches_served")
+                print(f"[DEBUG] evidence pool - {node} served '{query}' from {len(pooled)} pooled results")
+                return pooled
+            self.count("searches_run")
+            results = fn(query)
+            self.add(node, results)
+            return results
+        return search
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self._stats[name] += n
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,172 @@
+"""
+Hedged requests for tail-latency control.
+
+A call to a hedged node that is still running after that node's adaptive latency
+percentile gets a duplicate attempt (an LLM hedge goes to the profile's next endpoint,
+or to <PROFILE>_HEDGE_OPENAI_BASE when set); the first successful result wins.
+
+    HEDGE_NODES=ask_question,answer_question,search_web   (or "all"; unset disables hedging)
+    HEDGE_PERCENTILE=95     hedge once a call outlives this percentile of the node's recent calls
+    HEDGE_MIN_SAMPLES=20    observed calls per node before hedging starts
+    HEDGE_MIN_DELAY=0.5     never hedge earlier than this many seconds
+    HEDGE_MAX_RATE=0.05     at most this share of recent calls per node may be hedged (in-flight hedges count)
+
+Latency is tracked for every routed call, hedged or not, so `latency_stats()` can
+compare the p99 callers saw with the p99 of the first attempts alone.
+"""
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional
+
+from .profiling import follow
+
+HEDGE_NODES = {n.strip() for n in os.environ.get("HEDGE_NODES", "").split(",") if n.strip()}
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", 95))
+HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES", 20))
+HEDGE_MIN_DELAY = float(os.environ.get("HEDGE_MIN_DELAY", 0.5))
+HEDGE_MAX_RATE = float(os.environ.get("HEDGE_MAX_RATE", 0.05))
+LATENCY_WINDOW = int(os.environ.get("HEDGE_LATENCY_WINDOW", 200))
+
+# Attempts run here; the losing attempt is left to finish in the background, like calls abandoned at a deadline
+_hedge_pool = ThreadPoolExecutor(max_workers=int(os.environ.get("HEDGE_POOL_WORKERS", 32)),
+                                 thread_name_prefix="hedged-call")
+
+
+def enabled(node: str) -> bool:
+    return "all" in HEDGE_NODES or node in HEDGE_NODES
+
+
+def percentile(samples, q: float) -> Optional[float]:
+    """ Nearest-rank percentile; None for no samples """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+class LatencyTracker:
+    """
+    Rolling per-(kind, node) latencies. `first` holds how long the first attempt took
+    (what an unhedged call would have cost), `served` how long the caller actually waited.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._first = defaultdict(lambda: deque(maxlen=window))
+        self._served = defaultdict(lambda: deque(maxlen=window))
+        self._hedged = defaultdict(lambda: deque(maxlen=window))
+        self._reserved = defaultdict(int)
+        self._counts = defaultdict(lambda: {"calls": 0, "hedged": 0, "hedge_wins": 0})
+
+    def hedge_delay(self, key) -> Optional[float]:
+        """ Seconds to wait before hedging, or None while there are too few samples or the rate cap is hit """
+        with self._lock:
+            first = list(self._first[key])
+            if len(first) < HEDGE_MIN_SAMPLES or not self._within_rate(key):
+                return None
+        return max(HEDGE_MIN_DELAY, percentile(first, HEDGE_PERCENTILE))
+
+    def _within_rate(self, key) -> bool:
+        """ Whether one more hedge keeps recent plus in-flight hedges within HEDGE_MAX_RATE; call under the lock """
+        hedged, reserved = self._hedged[key], self._reserved[key]
+        return sum(hedged) + reserved + 1 <= HEDGE_MAX_RATE * (len(hedged) + reserved + 1)
+
+    def reserve_hedge(self, key) -> bool:
+        """
+        Claim a hedge for a call that just outlived its delay. Concurrent calls see each other's
+        claims, so they can't all pass the rate cap at once; `record_served(hedged=True)` settles it
+        """
+        with self._lock:
+            if not self._within_rate(key):
+                return False
+            self._reserved[key] += 1
+            return True
+
+    def record_first(self, key, seconds: float):
+        with self._lock:
+            self._first[key].append(seconds)
+
+    def record_served(self, key, seconds: float, hedged: bool, hedge_won: bool):
+        with self._lock:
+            self._served[key].append(seconds)
+            self._hedged[key].append(1 if hedged else 0)
+            if hedged:
+                self._reserved[key] -= 1
+            counts = self._counts[key]
+            counts["calls"] += 1
+            counts["hedged"] += hedged
+            counts["hedge_wins"] += hedge_won
+
+    def snapshot(self) -> dict:
+        """ Per "kind:node" counts and p50/p99 for first attempts vs. what callers saw """
+        with self._lock:
+            keys = list(self._counts)
+            stats = {}
+            for key in keys:
+                first, served = list(self._first[key]), list(self._served[key])
+                p99_first, p99_served = percentile(first, 99), percentile(served, 99)
+                stats[":".join(key)] = {
+                    **self._counts[key],
+                    "p50_first": percentile(first, 50),
+                    "p99_first": p99_first,
+                    "p50_served": percentile(served, 50),
+                    "p99_served": p99_served,
+                    "p99_saved": round(p99_first - p99_served, 4) if p99_first is not None and p99_served is not None else None,
+                }
+        return stats
+
+
+_tracker = LatencyTracker()
+
+
+def latency_stats() -> dict:
+    return _tracker.snapshot()
+
+
+def hedged(kind: str, node: str, primary, backup=None):
+    """
+    Call `primary()`; if `node` is hedged and the call outlives the node's hedge delay,
+    also start `backup()` (default: `primary` again) and return whichever succeeds first.
+    A failure only surfaces once both attempts have failed.
+    """
+    key = (kind, node)
+    started = time.monotonic()
+    delay = _tracker.hedge_delay(key) if enabled(node) else None
+
+    def timed(fn, first):
+        result = fn()
+        if first:
+            _tracker.record_first(key, time.monotonic() - started)
+        return result
+
+    if delay is None:
+        result = timed(primary, True)
+        _tracker.record_served(key, time.monotonic() - started, False, False)
+        return result
+
+    timed = follow(timed)
+    first = _hedge_pool.submit(timed, primary, True)
+    done, _ = wait([first], timeout=delay)
+    if done or not _tracker.reserve_hedge(key):
+        result = first.result()
+        _tracker.record_served(key, time.monotonic() - started, False, False)
+        return result
+
+    print(f"[DEBUG] Hedging {kind} call for {node} after {delay:.2f}s")
+    second = _hedge_pool.submit(timed, backup or primary, False)
+    pending = {first, second}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                for loser in pending:
+                    loser.cancel()
+                _tracker.record_served(key, time.monotonic() - started, True, future is second)
+                return future.result()
+            error = error or future.exception()
+    _tracker.record_served(key, time.monotonic() - started, True, False)
+    raise error
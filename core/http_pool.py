@@ -0,0 +1,196 @@
+import atexit
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict
+
+import httpx
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _host_limits_from_env() -> Dict[str, int]:
+    """ HTTP_HOST_LIMITS="api.novita.ai=32,api.tavily.com=8" """
+    limits = {}
+    for pair in os.environ.get("HTTP_HOST_LIMITS", "").split(","):
+        host, _, limit = pair.partition("=")
+        if host.strip() and limit.strip():
+            limits[host.strip()] = int(limit)
+    return limits
+
+
+class PoolMetrics:
+    """ Thread-safe per-host counters for requests flowing through the shared client """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = defaultdict(lambda: {
+            "requests": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "peak_in_flight": 0,
+            "queued": 0,
+            "wait_seconds": 0.0,
+            "busy_seconds": 0.0,
+        })
+
+    def queued(self, host, delta):
+        with self._lock:
+            self._hosts[host]["queued"] += delta
+
+    def started(self, host, waited):
+        with self._lock:
+            h = self._hosts[host]
+            h["requests"] += 1
+            h["in_flight"] += 1
+            h["peak_in_flight"] = max(h["peak_in_flight"], h["in_flight"])
+            h["wait_seconds"] += waited
+
+    def finished(self, host, elapsed, error=False):
+        with self._lock:
+            h = self._hosts[host]
+            h["in_flight"] -= 1
+            h["busy_seconds"] += elapsed
+            if error:
+                h["errors"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {host: dict(values) for host, values in self._hosts.items()}
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """ Holds the host slot until the response body has been consumed and closed """
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class HostLimitedTransport(httpx.BaseTransport):
+    """
+    Wraps the pooled transport with a per-host concurrency cap, so one busy
+    provider cannot take every connection in the shared pool.
+    """
+
+    def __init__(self, transport: httpx.HTTPTransport, per_host: int, host_limits: Dict[str, int], metrics: PoolMetrics):
+        self._transport = transport
+        self._per_host = per_host
+        self._host_limits = host_limits
+        self._semaphores = {}
+        self._lock = threading.Lock()
+        self.metrics = metrics
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self._host_limits.get(host, self._per_host))
+            return self._semaphores[host]
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        semaphore = self._semaphore(host)
+
+        # Waiting for a host slot counts against the pool timeout, like waiting for a connection
+        pool_timeout = request.extensions.get("timeout", {}).get("pool")
+        self.metrics.queued(host, 1)
+        wait_start = time.perf_counter()
+        acquired = semaphore.acquire(timeout=pool_timeout) if pool_timeout is not None else semaphore.acquire()
+        self.metrics.queued(host, -1)
+        if not acquired:
+            raise httpx.PoolTimeout(f"No free slot for {host} within {pool_timeout}s", request=request)
+        start = time.perf_counter()
+        self.metrics.started(host, start - wait_start)
+
+        released = False
+        release_lock = threading.Lock()
+
+        def release(error=False):
+            nonlocal released
+            with release_lock:
+                if released:
+                    return
+                released = True
+            self.metrics.finished(host, time.perf_counter() - start, error=error)
+            semaphore.release()
+
+        try:
+            response = self._transport.handle_request(request)
+        except Exception:
+            release(error=True)
+            raise
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    def connection_stats(self):
+        """ Open/idle connection counts read from the underlying httpcore pool """
+        pool = getattr(self._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for c in connections if c.is_idle())
+        return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+    def close(self):
+        self._transport.close()
+
+
+def _build_client() -> httpx.Client:
+    http2 = os.environ.get("HTTP2", "false").lower() in ("1", "true", "yes")
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("[WARNING] HTTP2 requested but the 'h2' package is not installed; using HTTP/1.1 keep-alive")
+            http2 = False
+
+    max_connections = int(os.environ.get("HTTP_MAX_CONNECTIONS", 100))
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=int(os.environ.get("HTTP_MAX_KEEPALIVE", 20)),
+        keepalive_expiry=float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", 30)),
+    )
+    timeout = httpx.Timeout(
+        float(os.environ.get("HTTP_TIMEOUT", 60)),
+        connect=float(os.environ.get("HTTP_CONNECT_TIMEOUT", 10)),
+    )
+    transport = HostLimitedTransport(
+        httpx.HTTPTransport(limits=limits, http2=http2, retries=1),
+        per_host=int(os.environ.get("HTTP_MAX_PER_HOST", max_connections)),
+        host_limits=_host_limits_from_env(),
+        metrics=PoolMetrics(),
+    )
+    return httpx.Client(transport=transport, timeout=timeout, follow_redirects=True)
+
+
+def get_http_client() -> httpx.Client:
+    """ Process-wide pooled client shared by the LLM and retrieval clients """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = _build_client()
+            atexit.register(_client.close)
+        return _client
+
+
+def pool_stats():
+    """ Per-host request counters plus open/idle connection counts for the shared pool """
+    transport = get_http_client()._transport
+    return {
+        "connections": transport.connection_stats(),
+        "hosts": transport.metrics.snapshot(),
+    }
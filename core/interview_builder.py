@@ -7,6 +7,8 @@ from langgraph.graph import START, END, StateGraph
 
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from .prompts import analyst_instructions, question_instructions, search_instructions, answer_instructions, section_writer_instructions
+from .prompts import history_summary_instructions, analyst_revision_instructions
+from .prompts import batched_question_instructions, batched_search_instructions, batched_answer_instructions, reformulation_search_instructions
 
 import operator
 from typing import  Annotated
@@ -14,21 +16,41 @@ from langgraph.graph import MessagesState
 
 from langchain_core.messages import get_buffer_string
 
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain_community.document_loaders import WikipediaLoader
 import asyncio
+import functools
+import hashlib
 import json
+import os
 import random
 import time
 from langchain_core.output_parsers import PydanticOutputParser
-from langgraph.types import RetryPolicy
+from langgraph.types import RetryPolicy, Send
+from langchain_core.runnables import RunnableConfig
 from .utils import sanitize_messages
+from .search_clients import WikipediaClient
+from .local_corpus import get_local_index
+from .run_control import RunCancelled, get_run_control
+from .token_budget import turn_novelty
+from .text_scoring import coverage, reciprocal_rank_fusion, split_passages
+from .profiling import profiled
+from .hedging import hedged
+from .research_memory import ResearchMemory
+from .refresh import content_hashes
+from .sources import format_document, merge_sources, register_source, source_id, strip_source_listings
 
 def apply_jitter(min_s=0.5, max_s=1.5):
     """ Small random delay to avoid provider-side traffic spikes during parallel nodes """
+    if os.environ.get("CASSETTE_MODE", "").lower() == "replay":
+        return
     time.sleep(random.uniform(min_s, max_s))
 
 
+def passage_key(doc) -> str:
+    """ Identity of one Wikipedia passage; passages cut from the same article section share a citation ID, not this key """
+    content_hash = hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()[:12]
+    return f"{doc.metadata.get('source', 'Wikipedia')}#{doc.metadata.get('page', '')}#{content_hash}"
+
+
 class Analyst(BaseModel):
     role: str = Field(
         description="Role of the analyst in the context of the topic.",
@@ -40,6 +62,11 @@ class Analyst(BaseModel):
     def persona(self) -> str:
         return f"Role: {self.role}\nDescription: {self.description}\n"
 
+    @property
+    def fingerprint(self) -> str:
+        """ Identity for caching: an analyst whose role and description are unchanged keeps its interview """
+        return hashlib.sha1(f"{self.role}\x1f{self.description}".encode("utf-8")).hexdigest()[:12]
+
 
 class Perspectives(BaseModel):
     analysts: List[Analyst] = Field(
@@ -57,38 +84,93 @@ class GenerateAnalystsState(TypedDict):
 class InterviewState(MessagesState):
     max_num_turns: int
     context: Annotated[list, operator.add]
+    sources: Annotated[dict, merge_sources]
+    history_summary: str
+    summarized_count: int
     analyst: Analyst
+    # Not "topic": the subgraph's output would collide with the research graph's own topic key
+    article_topic: str
     interview: str
     sections: list
+    interviews: dict
+    retrieval_skipped: bool
+    refresh: bool
+    searches: Annotated[list, operator.add]
 
 
 class SearchQuery(BaseModel):
     search_query: str = Field(None, description="Search query for retrieval.")
+    queries: List[str] = Field(default_factory=list, description="One search query per analyst question, when several were asked.")
+
+    def all_queries(self, limit: int = 1) -> List[str]:
+        """ The distinct queries to run this turn, at most `limit` """
+        queries = [q for q in self.queries if q and q.strip()] or ([self.search_query] if self.search_query else [])
+        return list(dict.fromkeys(queries))[:max(limit, 1)]
 
 
 class InterviewBuilder:
     
-    def __init__(self, llm):
-        self.llm = llm
+    def __init__(self, models):
+        self.models = models
         self.analyst_instructions = analyst_instructions
         self.question_instructions = question_instructions
         self.answer_instructions = answer_instructions
         self.section_writer_instructions = section_writer_instructions
-        self.tavily_search = TavilySearchResults(max_results=3)
+        self._tavily_search = None
+        self.wikipedia = WikipediaClient()
+        self.local_corpus_index = os.environ.get("LOCAL_CORPUS_INDEX")
+        default_backends = "web,wikipedia,local" if self.local_corpus_index else "web,wikipedia"
+        self.retrieval_backends = [b.strip() for b in os.environ.get("RETRIEVAL_BACKENDS", default_backends).split(",") if b.strip()]
         self.search_instructions = search_instructions
+        # Sub-questions per interview turn; each is retrieved in parallel and answered in one call
+        self.questions_per_turn = max(1, int(os.environ.get("QUESTIONS_PER_TURN", 1)))
+        # Phrasings per question; above 1, each backend's result lists are fused with reciprocal rank fusion
+        self.query_reformulations = max(1, int(os.environ.get("QUERY_REFORMULATIONS", 1)))
+        self.queries_per_turn = self.questions_per_turn * self.query_reformulations
+        # Exchanges kept verbatim in prompts; older ones are folded into a running summary (0 keeps full history)
+        self.history_window = int(os.environ.get("HISTORY_WINDOW", 0))
+        self.history_summary_words = int(os.environ.get("HISTORY_SUMMARY_WORDS", 300))
+        # Answer follow-ups from the gathered context when it covers this share of the question's terms (0 always searches)
+        self.gate_coverage = float(os.environ.get("RETRIEVAL_GATE_COVERAGE", 0))
+        self.gate_passages = int(os.environ.get("RETRIEVAL_GATE_PASSAGES", 3))
+        self.search_nodes = []
+        # Personas, passages and sections from past runs (RESEARCH_MEMORY); None disables reuse
+        self.memory = ResearchMemory.from_env()
+
+    @property
+    def tavily_search(self):
+        """ Built on first web search so importing the builder doesn't load langchain_community """
+        if self._tavily_search is None:
+            from .tavily_client import build_tavily_search
+            self._tavily_search = build_tavily_search(max_results=3)
+        return self._tavily_search
+
+    @tavily_search.setter
+    def tavily_search(self, value):
+        self._tavily_search = value
 
-    def create_analysts(self, state: GenerateAnalystsState):
+    def create_analysts(self, state: GenerateAnalystsState, config: RunnableConfig):
 
         """ Create analysts """
         topic=state['topic']
         max_analysts=state['max_analysts']
         human_analyst_feedback=state.get('human_analyst_feedback', '')
-        
+        run_id = config["configurable"].get("thread_id", "default")
+
+        if self.memory is not None and not human_analyst_feedback:
+            personas = self.memory.recall_analysts(topic, max_analysts)
+            if personas:
+                return {"analysts": [Analyst(**persona) for persona in personas]}
+
         parser = PydanticOutputParser(pydantic_object=Perspectives)
         
         system_message = analyst_instructions.format(topic=topic,
                                                     human_analyst_feedback=human_analyst_feedback,
                                                     max_analysts=max_analysts)
+        if human_analyst_feedback and state.get('analysts'):
+            # Revising an existing team: unchanged personas keep their fingerprint, and with it their finished interviews
+            system_message += analyst_revision_instructions.format(
+                analysts="\n".join(analyst.persona for analyst in state['analysts']))
         
         # Inject parser format instructions
         format_instructions = parser.get_format_instructions()
@@ -98,23 +180,26 @@ class InterviewBuilder:
         full_messages = [SystemMessage(content=full_system_message)] + [HumanMessage(content=f"Generate the set of analysts. Make sure to generate exactly {max_analysts} analysts.")]
         sanitized = sanitize_messages(full_messages)
         apply_jitter(1.0, 3.0) # Longer jitter for the initial heavy call
-        response = self.llm.invoke(sanitized)
+        response = self.models.invoke("create_analysts", sanitized, config)
         
         try:
             analysts = parser.parse(response.content)
-            return {"analysts": analysts.analysts}
         except Exception as e:
             print(f"[ERROR] Failed to parse analysts: {e}")
             # Fallback: try to find JSON in the response
+            analysts = None
             try:
                 import re
                 json_match = re.search(r'\{.*\}', response.content, re.DOTALL)
                 if json_match:
                     analysts = parser.parse(json_match.group(0))
-                    return {"analysts": analysts.analysts}
             except:
                 pass
-            raise e
+            if analysts is None:
+                raise e
+        if self.memory is not None:
+            self.memory.remember_analysts(topic, analysts.analysts, run_id)
+        return {"analysts": analysts.analysts}
 
 
     def human_feedback(self, state: GenerateAnalystsState):
@@ -131,41 +216,80 @@ class InterviewBuilder:
         return END
     
 
-    def generate_question(self, state: InterviewState):
+    def compact_history(self, state: InterviewState, config: RunnableConfig) -> dict:
+        """
+        Fold exchanges that slid out of the HISTORY_WINDOW into the running summary.
+        Runs once per turn (from ask_question); the rest of the turn reuses the result from state.
+        """
+        if not self.history_window:
+            return {}
+        messages = state["messages"]
+        done = state.get("summarized_count", 0)
+        cut = len(messages) - 2 * self.history_window
+        if cut <= done:
+            return {}
+
+        instructions = history_summary_instructions.format(
+            summary=state.get("history_summary") or "(empty)",
+            turns=get_buffer_string(messages[done:cut]),
+            max_words=self.history_summary_words,
+        )
+        full_messages = [SystemMessage(content=instructions), HumanMessage(content="Update the summary.")]
+        summary = self.models.invoke("summarize_history", sanitize_messages(full_messages), config, bucket=state["analyst"].role)
+        return {"history_summary": summary.content, "summarized_count": cut}
+
+
+    def history(self, state: InterviewState) -> list:
+        """ Interview messages as prompts see them: running summary plus the recent window """
+        done = state.get("summarized_count", 0)
+        if not done:
+            return state["messages"]
+        summary = HumanMessage(content=f"### Summary of the earlier interview:\n{state['history_summary']}")
+        return [summary] + state["messages"][done:]
+
+
+    def generate_question(self, state: InterviewState, config: RunnableConfig):
         """ Node to generate a question """
         analyst = state["analyst"]
-        messages = state["messages"]
+        compacted = self.compact_history(state, config)
+        messages = self.history({**state, **compacted})
         system_message = self.question_instructions.format(goals=analyst.persona)
+        if self.questions_per_turn > 1:
+            system_message += batched_question_instructions.format(k=self.questions_per_turn)
         
         full_messages = [SystemMessage(content=system_message)] + messages
         sanitized = sanitize_messages(full_messages, actor_name="analyst")
         
         print(f"\n[DEBUG] generate_question - Analyst: {analyst.role}")
         apply_jitter()
-        question = self.llm.invoke(sanitized)
+        question = self.models.invoke("ask_question", sanitized, config, bucket=analyst.role)
         question.name = "analyst"
-        return {"messages": [question]}
+        return {"messages": [question], **compacted}
     
 
-    def search_web(self, state: InterviewState):
-
-        """ Retrieve docs from web search """
+    def generate_search_query(self, state: InterviewState, node: str, config: RunnableConfig) -> SearchQuery:
+        """ Extract a structured search query from the interview so far """
         parser = PydanticOutputParser(pydantic_object=SearchQuery)
-        print(f"\n[DEBUG] search_web - Generating query...")
+        print(f"\n[DEBUG] {node} - Generating query...")
         
         format_instructions = parser.get_format_instructions()
-        system_message = self.search_instructions.content + f"\n\n{format_instructions}"
+        system_message = self.search_instructions.content
+        if self.questions_per_turn > 1:
+            system_message += batched_search_instructions.format(k=self.questions_per_turn)
+        if self.query_reformulations > 1:
+            system_message += reformulation_search_instructions.format(n=self.query_reformulations)
+        system_message += f"\n\n{format_instructions}"
         
-        full_messages = [SystemMessage(content=system_message)] + state['messages']
+        full_messages = [SystemMessage(content=system_message)] + self.history(state)
         sanitized = sanitize_messages(full_messages, actor_name="searcher")
         
         apply_jitter()
-        response = self.llm.invoke(sanitized)
+        response = self.models.invoke(node, sanitized, config, bucket=state["analyst"].role)
         
         try:
             search_query = parser.parse(response.content)
         except Exception as e:
-            print(f"[ERROR] Failed to parse search query: {e}")
+            print(f"[ERROR] Failed to parse {node} query: {e}")
             # Fallback
             try:
                 import re
@@ -177,14 +301,70 @@ class InterviewBuilder:
             except:
                 search_query = SearchQuery(search_query=None)
         
-        print(f"[DEBUG] search_web - Query: {search_query.search_query}")
+        print(f"[DEBUG] {node} - Query: {search_query.all_queries(self.queries_per_turn)}")
+        return search_query
+
+
+    def backend(self, node: str):
+        """ The live search function behind a search node, `fn(query) -> results` """
+        return {
+            "search_web": lambda query: self.tavily_search.invoke(query),
+            "search_wikipedia": lambda query: self.wikipedia.load(query, load_max_docs=2),
+            "search_local": lambda query: get_local_index(self.local_corpus_index).search(query, k=3),
+        }[node]
+
+
+    @staticmethod
+    def search_log(node: str, queries: List[str], results: list) -> list:
+        """ This turn's queries with the content hashes of their results, so a refresh can re-check them """
+        return [{"node": node, "query": query, "hashes": content_hashes(batch)} for query, batch in zip(queries, results)]
+
+
+    def recorded(self, config: RunnableConfig, node: str, fn, recall: bool = True):
+        """
+        `fn(query)` hedged when `node` is in HEDGE_NODES, answered from research memory
+        when it holds enough matching passages (web and Wikipedia; not with `recall` off,
+        as when refreshing an analyst whose evidence changed) or from the run's
+        evidence pool when another interview already covered the query, and routed
+        through the run's record/replay cassette when CASSETTE_MODE is set
+        """
+        control = get_run_control(config)
+        search = lambda query: hedged("search", node, lambda: fn(query))
+        if self.memory is not None and node != "search_local":
+            search = self.memory.wrap(node, config["configurable"].get("thread_id", "default"), search, recall=recall)
+        if control.evidence.enabled:
+            search = control.evidence.wrap(node, search)
+        return control.cassette.wrap("search", node, search) if control.cassette is not None else search
+
+
+    def merge_results(self, results: List[list], key) -> list:
+        """
+        Combine one backend's per-query result lists. With reformulations, the lists are
+        fused with reciprocal rank fusion and cut to the volume plain queries would return
+        (one list's worth per question); otherwise they are concatenated. Duplicates by `key` are dropped.
+        """
+        if self.query_reformulations > 1:
+            top_k = max((len(r) for r in results), default=0) * self.questions_per_turn
+            return reciprocal_rank_fusion(results, key=key, top_k=top_k)
+        return list({key(item): item for batch in results for item in batch}.values())
+
+
+    def search_web(self, state: InterviewState, config: RunnableConfig):
+
+        """ Retrieve docs from web search """
+        queries = self.generate_search_query(state, "search_web", config).all_queries(self.queries_per_turn)
         
-        if not search_query.search_query:
+        if not queries:
             return {"context": ["No relevant search results found."]}
             
         try:
             apply_jitter(0.2, 1.0) # Light jitter for search
-            search_docs = self.tavily_search.invoke(search_query.search_query)
+            results = get_run_control(config).map(self.recorded(config, "search_web", self.backend("search_web"), recall=not state.get("refresh")), queries)
+            if len(results) == 1:
+                search_docs = results[0]
+            else:
+                search_docs = self.merge_results([batch for batch in results if isinstance(batch, list)],
+                                                 key=lambda doc: doc.get("url") if isinstance(doc, dict) else str(doc))
             
             # Diagnostic logging
             print(f"[DEBUG] search_web - Results type: {type(search_docs)}")
@@ -198,11 +378,13 @@ class InterviewBuilder:
                 return {"context": ["Search service returned an unexpected format."]}
 
             formatted_search_docs = []
+            sources = {}
             for doc in search_docs:
                 if isinstance(doc, dict) and "url" in doc and "content" in doc:
-                    formatted_search_docs.append(
-                        f'<Document href="{doc["url"]}"/>\n{doc["content"]}\n</Document>'
-                    )
+                    if source_id(doc["url"]) in sources:
+                        continue
+                    sid = register_source(sources, doc["url"], title=doc.get("title", ""))
+                    formatted_search_docs.append(format_document(sid, doc["content"], title=doc.get("title", "")))
                 elif isinstance(doc, str):
                     # Handle case where it's a list of strings
                     formatted_search_docs.append(f'<Document source="Web Search"/>\n{doc}\n</Document>')
@@ -212,87 +394,142 @@ class InterviewBuilder:
             if not formatted_search_docs:
                 return {"context": ["No valid documents found in search results."]}
                 
-            return {"context": ["\n\n---\n\n".join(formatted_search_docs)]}
+            return {"context": ["\n\n---\n\n".join(formatted_search_docs)], "sources": sources,
+                    "searches": self.search_log("search_web", queries, results)}
             
+        except RunCancelled:
+            raise
         except Exception as e:
             print(f"[ERROR] search_web execution failed: {e}")
             return {"context": [f"Web search failed: {str(e)}"]}
 
 
-    def search_wikipedia(self, state: InterviewState):
+    def search_wikipedia(self, state: InterviewState, config: RunnableConfig):
         """ Retrieve docs from wikipedia """
-        parser = PydanticOutputParser(pydantic_object=SearchQuery)
-        print(f"\n[DEBUG] search_wikipedia - Generating query...")
-        
-        format_instructions = parser.get_format_instructions()
-        system_message = self.search_instructions.content + f"\n\n{format_instructions}"
-        
-        full_messages = [SystemMessage(content=system_message)] + state['messages']
-        sanitized = sanitize_messages(full_messages, actor_name="searcher")
-        
-        apply_jitter()
-        response = self.llm.invoke(sanitized)
-        
-        try:
-            search_query = parser.parse(response.content)
-        except Exception as e:
-            print(f"[ERROR] Failed to parse wikipedia query: {e}")
-            # Fallback
-            try:
-                import re
-                json_match = re.search(r'\{.*\}', response.content, re.DOTALL)
-                if json_match:
-                    search_query = parser.parse(json_match.group(0))
-                else:
-                    search_query = SearchQuery(search_query=None)
-            except:
-                search_query = SearchQuery(search_query=None)
-        
-        print(f"[DEBUG] search_wikipedia - Query: {search_query.search_query}")
+        queries = self.generate_search_query(state, "search_wikipedia", config).all_queries(self.queries_per_turn)
         
-        if not search_query.search_query:
+        if not queries:
             return {"context": ["No relevant Wikipedia articles found."]}
 
         try:
-            search_docs = WikipediaLoader(query=search_query.search_query, load_max_docs=2).load()
+            results = get_run_control(config).map(self.recorded(config, "search_wikipedia", self.backend("search_wikipedia"), recall=not state.get("refresh")), queries)
+            search_docs = self.merge_results(results, key=passage_key)
             
             print(f"[DEBUG] search_wikipedia - Results: {len(search_docs)} docs found")
             
             formatted_search_docs = []
+            sources = {}
+            seen = set()
             for doc in search_docs:
                 if hasattr(doc, 'page_content') and hasattr(doc, 'metadata'):
-                    source = doc.metadata.get("source", "Wikipedia")
-                    page = doc.metadata.get("page", "")
-                    formatted_search_docs.append(
-                        f'<Document source="{source}" page="{page}"/>\n{doc.page_content}\n</Document>'
-                    )
+                    title = doc.metadata.get("title", "Wikipedia")
+                    if passage_key(doc) in seen:
+                        continue
+                    seen.add(passage_key(doc))
+                    sid = register_source(sources, doc.metadata.get("source", "Wikipedia"), title=title,
+                                          page=doc.metadata.get("page", ""))
+                    formatted_search_docs.append(format_document(sid, doc.page_content, title=title))
                 else:
                     print(f"[WARNING] search_wikipedia - skipping unexpected doc type: {type(doc)}")
 
             if not formatted_search_docs:
                 return {"context": ["No relevant content found on Wikipedia."]}
 
-            return {"context": ["\n\n---\n\n".join(formatted_search_docs)]}
+            return {"context": ["\n\n---\n\n".join(formatted_search_docs)], "sources": sources,
+                    "searches": self.search_log("search_wikipedia", queries, results)}
+        except RunCancelled:
+            raise
         except Exception as e:
             print(f"[ERROR] search_wikipedia execution failed: {e}")
             return {"context": [f"Wikipedia search failed: {str(e)}"]}
     
 
-    def generate_answer(self, state: InterviewState):
+    def search_local(self, state: InterviewState, config: RunnableConfig):
+        """ Retrieve passages from the local corpus index """
+        queries = self.generate_search_query(state, "search_local", config).all_queries(self.queries_per_turn)
+
+        if not queries:
+            return {"context": ["No relevant local documents found."]}
+
+        try:
+            results = get_run_control(config).map(self.recorded(config, "search_local", self.backend("search_local")), queries)
+            hits = self.merge_results(results, key=lambda hit: hit["passage_id"])
+
+            print(f"[DEBUG] search_local - Results: {len(hits)} passages found")
+
+            sources = {}
+            formatted_search_docs = [
+                format_document(register_source(sources, hit["source"], title=hit["title"]), hit["content"], title=hit["title"])
+                for hit in hits
+            ]
+
+            if not formatted_search_docs:
+                return {"context": ["No relevant content found in the local corpus."]}
+
+            return {"context": ["\n\n---\n\n".join(formatted_search_docs)], "sources": sources,
+                    "searches": self.search_log("search_local", queries, results)}
+        except RunCancelled:
+            raise
+        except Exception as e:
+            print(f"[ERROR] search_local execution failed: {e}")
+            return {"context": [f"Local corpus search failed: {str(e)}"]}
+    
+
+    def route_retrieval(self, state: InterviewState, config: RunnableConfig):
+        """ Search every backend, or go straight to the answer when the context gathered so far covers the question """
+        context = state.get("context", [])
+        if self.gate_coverage <= 0 or not context:
+            return self.search_nodes
+        passages = [passage for block in context for passage in split_passages(block)]
+        score = coverage(state["messages"][-1].content, passages, k=self.gate_passages)
+        if score < self.gate_coverage:
+            return self.search_nodes
+        get_run_control(config).evidence.count("searches_skipped", len(self.search_nodes))
+        print(f"[DEBUG] route_retrieval - {state['analyst'].role}: context covers {score:.0%} of the question, skipping search")
+        return [Send("answer_question", {**state, "retrieval_skipped": True})]
+
+
+    def shared_evidence(self, state: InterviewState, config: RunnableConfig):
+        """
+        Context block of the pooled results other interviews found that best match the
+        latest question (results this interview already has are skipped), and their sources
+        """
+        pool = get_run_control(config).evidence
+        if not pool.enabled or not pool.answer_passages or not state.get("messages"):
+            return "", {}
+        hits = pool.search(state["messages"][-1].content, k=pool.answer_passages, exclude=state.get("sources") or {})
+        sources = {}
+        documents = []
+        for hit in hits:
+            doc = hit["described"]
+            sid = register_source(sources, doc["url"], title=doc["title"], page=doc["page"])
+            documents.append(format_document(sid, doc["content"], title=doc["title"]))
+        if documents:
+            pool.count("answer_passages", len(documents))
+            print(f"[DEBUG] generate_answer - {len(documents)} passages from the shared evidence pool")
+        return "\n\n---\n\n".join(documents), sources
+
+
+    def generate_answer(self, state: InterviewState, config: RunnableConfig):
 
         """ Node to answer a question """
         analyst = state["analyst"]
-        messages = state["messages"]
+        messages = self.history(state)
         context = state.get("context", [])
         
         # Join context list into a single string and truncate if too large
         context_str = "\n\n".join(context) if context else "No context provided."
+        shared, shared_sources = self.shared_evidence(state, config)
+        if shared:
+            context_str = f"{context_str}\n\n---\n\n{shared}"
         if len(context_str) > 20000:
             print(f"[WARNING] Truncating context from {len(context_str)} to 20000 chars")
             context_str = context_str[:20000] + "\n\n[TRUNCATED FOR LENGTH]"
         
         # Move context out of SystemMessage to keep it small and standard
-        system_message = f"You are a world-class domain expert specializing in {analyst.persona}. Answer the analyst's questions based strictly on the provided context."
+        system_message = f"You are a world-class domain expert specializing in {analyst.persona}. Answer the analyst's questions based strictly on the provided context. Cite each claim with the id of its document in square brackets, e.g. [S3f9a2c]; do not list sources."
+        if self.questions_per_turn > 1:
+            system_message += batched_answer_instructions
         
         print(f"\n[DEBUG] generate_answer - Analyst: {analyst.role}")
         print(f"[DEBUG] generate_answer - Context length: {len(context_str)} characters")
@@ -305,7 +542,9 @@ class InterviewBuilder:
         
         try:
             apply_jitter()
-            answer = self.llm.invoke(sanitized)
+            answer = self.models.invoke("answer_question", sanitized, config, bucket=analyst.role)
+        except RunCancelled:
+            raise
         except Exception as e:
             print(f"[ERROR] generate_answer failed: {e}")
             # Log exact payload if it fails for manual inspection
@@ -324,8 +563,13 @@ class InterviewBuilder:
                 pass
             raise e
             
+        # Score what this turn's retrieval added, for the turn scheduler (nothing, if it was skipped)
+        turn_size = len(self.retrieval_backends)
+        novelty = 0.0 if state.get("retrieval_skipped") else turn_novelty(context[-turn_size:], context[:-turn_size])
+        get_run_control(config).ledger.record_turn(analyst.role, novelty)
+
         answer.name = "expert"
-        return {"messages": [answer]}
+        return {"messages": [answer], "sources": shared_sources}
 
 
     def save_interview(self, state: InterviewState):
@@ -336,16 +580,21 @@ class InterviewBuilder:
         return {"interview": interview}
 
 
-    def route_messages(self, state: InterviewState,
+    def route_messages(self, state: InterviewState, config: RunnableConfig,
                     name: str = "expert"):
 
         """ Route between question and answer """
+        control = get_run_control(config)
+        if control.stopped() or control.abandoned(state["analyst"].role):
+            return 'save_interview'
         messages = state["messages"]
         max_num_turns = state.get('max_num_turns',2)
         num_responses = len(
             [m for m in messages if isinstance(m, AIMessage) and m.name == name]
         )
-        if num_responses >= max_num_turns:
+        # Depth is counted in questions, so batched turns reach it in fewer round-trips
+        questions_answered = num_responses * self.questions_per_turn
+        if not get_run_control(config).ledger.grant_turn(state["analyst"].role, questions_answered, max_num_turns):
             return 'save_interview'
         last_question = messages[-2]
 
@@ -354,7 +603,7 @@ class InterviewBuilder:
         return "ask_question"
     
 
-    def write_section(self, state: InterviewState):
+    def write_section(self, state: InterviewState, config: RunnableConfig):
 
         """ Node to answer a question """
         interview = state["interview"]
@@ -364,24 +613,81 @@ class InterviewBuilder:
         full_messages = [SystemMessage(content=system_message)] + [HumanMessage(content=f"Use this source to write your section: {context}")]
         sanitized = sanitize_messages(full_messages, actor_name="editor")
         apply_jitter(1.0, 2.0)
-        section = self.llm.invoke(sanitized)
-        return {"sections": [section.content]}
+        section = self.models.invoke("write_section", sanitized, config, bucket=analyst.role)
+        section = strip_source_listings(section.content)
+        if self.memory is not None:
+            self.memory.remember_section(analyst, state.get("article_topic", ""), section, state.get("sources"),
+                                         config["configurable"].get("thread_id", "default"))
+        return {"sections": [section], "interviews": {analyst.fingerprint: {"role": analyst.role, "sections": [section],
+                                                                             "searches": state.get("searches", [])}}}
+
+
+    def recall_section(self, state: InterviewState):
+        """
+        Reuse a fresh section research memory holds by this same analyst on an overlapping topic,
+        unless the analyst is being refreshed because that section's evidence changed
+        """
+        recalled = None if state.get("refresh") else self.memory.recall_section(state["analyst"], state.get("article_topic", ""))
+        if recalled is None:
+            return {}
+        print(f"[DEBUG] research memory - reusing the section by {state['analyst'].role}")
+        return {"sections": [recalled["section"]], "sources": recalled["sources"],
+                "interviews": {state["analyst"].fingerprint: {"role": state["analyst"].role, "sections": [recalled["section"]]}}}
+
+
+    def route_start(self, state: InterviewState):
+        """ Interview unless `recall_section` found a stored section """
+        return END if state.get("sections") else "ask_question"
     
 
+    def interruptible(self, node, on_stop=None, hard=False):
+        """
+        Wrap an interview node so a cancelled or timed-out run, or an abandoned
+        straggler interview, drains through the remaining steps without further LLM
+        or search calls. `hard` nodes keep running through the reduce grace window.
+        """
+        @functools.wraps(node)
+        def wrapper(state: InterviewState, config: RunnableConfig):
+            control = get_run_control(config)
+            if not control.stopped(hard) and not control.abandoned(state["analyst"].role):
+                try:
+                    return node(state, config)
+                except RunCancelled as e:
+                    print(f"[WARNING] {node.__name__} stopped: {e}")
+            return dict(on_stop or {})
+        return wrapper
+
+
     def build(self):
         interview_builder = StateGraph(InterviewState)
         retry_policy = RetryPolicy(max_attempts=3, backoff_factor=2.0)
         
-        interview_builder.add_node("ask_question", self.generate_question, retry=retry_policy)
-        interview_builder.add_node("search_web", self.search_web, retry=retry_policy)
-        interview_builder.add_node("search_wikipedia", self.search_wikipedia, retry=retry_policy)
-        interview_builder.add_node("answer_question", self.generate_answer, retry=retry_policy)
-        interview_builder.add_node("save_interview", self.save_interview)
-        interview_builder.add_node("write_section", self.write_section, retry=retry_policy)
-
-        interview_builder.add_edge(START, "ask_question")
-        interview_builder.add_edge("ask_question", "search_web")
-        interview_builder.add_edge("ask_question", "search_wikipedia")
+        interview_builder.add_node("ask_question", profiled("ask_question", self.interruptible(self.generate_question)), retry=retry_policy)
+        retrieval_nodes = {
+            "web": ("search_web", self.search_web),
+            "wikipedia": ("search_wikipedia", self.search_wikipedia),
+            "local": ("search_local", self.search_local),
+        }
+        if "local" in self.retrieval_backends and not self.local_corpus_index:
+            raise ValueError("RETRIEVAL_BACKENDS includes 'local' but LOCAL_CORPUS_INDEX is not set")
+        search_nodes = []
+        for backend in self.retrieval_backends:
+            name, node = retrieval_nodes[backend]
+            interview_builder.add_node(name, profiled(name, self.interruptible(node)), retry=retry_policy)
+            search_nodes.append(name)
+        interview_builder.add_node("answer_question", profiled("answer_question", self.interruptible(self.generate_answer)), retry=retry_policy)
+        interview_builder.add_node("save_interview", profiled("save_interview", self.save_interview))
+        interview_builder.add_node("write_section", profiled("write_section", self.interruptible(self.write_section, {"sections": []}, hard=True)), retry=retry_policy)
+
+        if self.memory is not None:
+            interview_builder.add_node("recall_section", self.recall_section)
+            interview_builder.add_edge(START, "recall_section")
+            interview_builder.add_conditional_edges("recall_section", self.route_start, ["ask_question", END])
+        else:
+            interview_builder.add_edge(START, "ask_question")
+        self.search_nodes = search_nodes
+        interview_builder.add_conditional_edges("ask_question", self.route_retrieval, search_nodes + ["answer_question"])
+        interview_builder.add_edge(search_nodes, "answer_question")
         interview_builder.add_conditional_edges("answer_question", self.route_messages,['ask_question','save_interview'])
         interview_builder.add_edge("save_interview", "write_section")
         interview_builder.add_edge("write_section", END)
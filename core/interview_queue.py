@@ -0,0 +1,401 @@
+"""
+Distributed execution of interview sub-graphs over a pluggable task queue.
+
+    INTERVIEW_QUEUE=local                                 in-process queue and worker threads (single machine / tests)
+    INTERVIEW_QUEUE=sqlite:service_data/interviews.sqlite  shared SQLite queue for worker processes
+
+Workers for a shared queue run next to the service or on any machine that can reach it:
+
+    python -m core.interview_queue worker --queue sqlite:service_data/interviews.sqlite --threads 4
+
+Other transports plug in with `register_queue(scheme, factory)`; a queue only has to
+implement the abstract methods of `InterviewQueue`.
+
+When the producer gives up on a task (the run was cancelled or the wait timed out) it
+withdraws it: a queued task is never handed out, a finished one's result is dropped, and
+the worker running one abandons the interview at its next node.
+"""
+import abc
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from queue import Empty, Queue
+from typing import Optional
+
+from langchain_core.messages import message_to_dict, messages_from_dict
+
+
+class RemoteInterviewError(Exception):
+    """ An interview failed on a worker (retried by RetryPolicy like a local failure) """
+
+
+def encode_interview(state: dict) -> dict:
+    """ JSON-friendly InterviewState: the analyst, the topic and the opening messages """
+    return {
+        "analyst": state["analyst"].model_dump(),
+        **({"article_topic": state["article_topic"]} if "article_topic" in state else {}),
+        "messages": [message_to_dict(m) for m in state.get("messages", [])],
+        **({"max_num_turns": state["max_num_turns"]} if "max_num_turns" in state else {}),
+        **({"refresh": True} if state.get("refresh") else {}),
+    }
+
+
+def decode_interview(payload: dict) -> dict:
+    from .interview_builder import Analyst
+
+    state = {"analyst": Analyst(**payload["analyst"]), "messages": messages_from_dict(payload["messages"])}
+    if "max_num_turns" in payload:
+        state["max_num_turns"] = payload["max_num_turns"]
+    if "article_topic" in payload:
+        state["article_topic"] = payload["article_topic"]
+    if payload.get("refresh"):
+        state["refresh"] = True
+    return state
+
+
+class InterviewQueue(abc.ABC):
+    """ Task queue between the research graph (producer) and interview workers (consumers) """
+
+    @abc.abstractmethod
+    def put_task(self, task: dict):
+        ...
+
+    @abc.abstractmethod
+    def get_task(self, timeout: float) -> Optional[dict]:
+        """ Claim the next task, or None after `timeout` seconds """
+
+    @abc.abstractmethod
+    def put_result(self, task_id: str, result: dict):
+        ...
+
+    @abc.abstractmethod
+    def get_result(self, task_id: str, timeout: float) -> Optional[dict]:
+        """ The task's result (removing it from the queue), or None if not done within `timeout` """
+
+    @abc.abstractmethod
+    def cancel_task(self, task_id: str):
+        """ Withdraw a task: drop it if queued or done, flag it for its worker if running """
+
+    @abc.abstractmethod
+    def task_cancelled(self, task_id: str) -> bool:
+        """ Whether a claimed task was withdrawn (polled by its worker) """
+
+
+class LocalInterviewQueue(InterviewQueue):
+    """ In-process stand-in: the same task/result protocol over a queue.Queue """
+
+    def __init__(self):
+        self._tasks = Queue()
+        self._results = {}
+        self._cancelled = set()
+        self._done = threading.Condition()
+
+    def put_task(self, task):
+        # Round-trip through JSON so local runs exercise the same serialization as remote ones
+        self._tasks.put(json.loads(json.dumps(task)))
+
+    def get_task(self, timeout):
+        give_up = time.monotonic() + timeout
+        while True:
+            try:
+                task = self._tasks.get(timeout=max(give_up - time.monotonic(), 0))
+            except Empty:
+                return None
+            with self._done:
+                if task["task_id"] not in self._cancelled:
+                    return task
+                self._cancelled.discard(task["task_id"])
+
+    def put_result(self, task_id, result):
+        with self._done:
+            if task_id in self._cancelled:
+                self._cancelled.discard(task_id)
+                return
+            self._results[task_id] = json.loads(json.dumps(result))
+            self._done.notify_all()
+
+    def get_result(self, task_id, timeout):
+        with self._done:
+            self._done.wait_for(lambda: task_id in self._results, timeout=timeout)
+            return self._results.pop(task_id, None)
+
+    def cancel_task(self, task_id):
+        with self._done:
+            if self._results.pop(task_id, None) is None:
+                self._cancelled.add(task_id)
+
+    def task_cancelled(self, task_id):
+        with self._done:
+            return task_id in self._cancelled
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS interview_tasks (
+    task_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    claimed_at REAL,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS interview_tasks_by_status ON interview_tasks (status, created_at);
+"""
+
+
+class SqliteInterviewQueue(InterviewQueue):
+    """
+    Queue table in a SQLite file shared by the service and worker processes. A task
+    claimed longer than `lease` seconds ago (its worker likely died) is handed out again.
+    """
+
+    def __init__(self, path: str, lease: Optional[float] = None, poll: float = 0.2):
+        self.path = path
+        self.lease = lease if lease is not None else float(os.environ.get("INTERVIEW_TASK_LEASE", 900))
+        self.poll = poll
+        self.worker = f"{os.uname().nodename}:{os.getpid()}"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def put_task(self, task):
+        with self._connect() as conn:
+            conn.execute("INSERT INTO interview_tasks (task_id, payload, status, created_at) VALUES (?, ?, 'queued', ?)",
+                         (task["task_id"], json.dumps(task), time.time()))
+
+    def _claim(self):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Withdrawn tasks whose worker never reported back
+            conn.execute("DELETE FROM interview_tasks WHERE status = 'cancelled' AND claimed_at < ?", (time.time() - self.lease,))
+            row = conn.execute(
+                "SELECT task_id, payload FROM interview_tasks WHERE status = 'queued' OR (status = 'running' AND claimed_at < ?) "
+                "ORDER BY created_at LIMIT 1", (time.time() - self.lease,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE interview_tasks SET status = 'running', worker = ?, claimed_at = ? WHERE task_id = ?",
+                             (self.worker, time.time(), row[0]))
+            conn.execute("COMMIT")
+        return json.loads(row[1]) if row else None
+
+    def get_task(self, timeout):
+        give_up = time.monotonic() + timeout
+        while True:
+            task = self._claim()
+            if task is not None or time.monotonic() >= give_up:
+                return task
+            time.sleep(self.poll)
+
+    def put_result(self, task_id, result):
+        with self._connect() as conn:
+            conn.execute("UPDATE interview_tasks SET status = 'done', result = ? WHERE task_id = ? AND status = 'running'",
+                         (json.dumps(result), task_id))
+            conn.execute("DELETE FROM interview_tasks WHERE task_id = ? AND status = 'cancelled'", (task_id,))
+
+    def get_result(self, task_id, timeout):
+        give_up = time.monotonic() + timeout
+        while True:
+            with self._connect() as conn:
+                row = conn.execute("SELECT result FROM interview_tasks WHERE task_id = ? AND status = 'done'", (task_id,)).fetchone()
+                if row is not None:
+                    conn.execute("DELETE FROM interview_tasks WHERE task_id = ?", (task_id,))
+                    return json.loads(row[0])
+            if time.monotonic() >= give_up:
+                return None
+            time.sleep(self.poll)
+
+    def cancel_task(self, task_id):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM interview_tasks WHERE task_id = ? AND status IN ('queued', 'done')", (task_id,))
+            conn.execute("UPDATE interview_tasks SET status = 'cancelled' WHERE task_id = ? AND status = 'running'", (task_id,))
+            conn.execute("COMMIT")
+
+    def task_cancelled(self, task_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT status FROM interview_tasks WHERE task_id = ?", (task_id,)).fetchone()
+        # A missing row was withdrawn while queued or done; nobody will read this result
+        return row is None or row[0] == "cancelled"
+
+
+_QUEUE_TYPES = {
+    "local": lambda target: LocalInterviewQueue(),
+    "sqlite": lambda target: SqliteInterviewQueue(target or os.path.join("service_data", "interviews.sqlite")),
+}
+
+
+def register_queue(scheme: str, factory):
+    """ Make INTERVIEW_QUEUE=<scheme>:<target> build a queue with `factory(target)` """
+    _QUEUE_TYPES[scheme] = factory
+
+
+def open_queue(url: str) -> InterviewQueue:
+    scheme, _, target = url.partition(":")
+    if scheme not in _QUEUE_TYPES:
+        raise ValueError(f"Unknown INTERVIEW_QUEUE scheme {scheme!r}; known: {', '.join(_QUEUE_TYPES)}")
+    return _QUEUE_TYPES[scheme](target)
+
+
+class InterviewExecutor:
+    """ Producer side: ships interviews to the queue and hands back futures for their results """
+
+    def __init__(self, queue: InterviewQueue):
+        self.queue = queue
+        self._waiters = ThreadPoolExecutor(max_workers=int(os.environ.get("INTERVIEW_QUEUE_WAITERS", 32)),
+                                           thread_name_prefix="interview-result")
+
+    def submit(self, state: dict, config, timeout: Optional[float] = None):
+        """
+        Queue one interview of the run in `config`; the future resolves to
+        {"sections", "sources", "interviews"} and its token usage is folded into the run's ledger.
+        """
+        from .run_control import get_run_control
+
+        control = get_run_control(config)
+        task = {
+            "task_id": uuid.uuid4().hex,
+            "thread_id": control.thread_id,
+            # Workers run on their own clocks, so the deadline travels as seconds left
+            "deadline_in": control.remaining(),
+            "state": encode_interview(state),
+        }
+        self.queue.put_task(task)
+        return self._waiters.submit(self._await, task, control, timeout)
+
+    def _await(self, task, control, timeout):
+        give_up = time.monotonic() + timeout if timeout else None
+        while True:
+            if control.cancelled or (give_up and time.monotonic() >= give_up):
+                self.queue.cancel_task(task["task_id"])
+                raise RemoteInterviewError(f"Gave up waiting for interview task {task['task_id']}")
+            result = self.queue.get_result(task["task_id"], timeout=1.0)
+            if result is None:
+                continue
+            if "error" in result:
+                raise RemoteInterviewError(result["error"])
+            for bucket, usage in (result.get("token_usage") or {}).items():
+                control.ledger.merge(bucket, usage)
+            return {"sections": result.get("sections", []), "sources": result.get("sources", {}),
+                    "interviews": result.get("interviews", {})}
+
+
+_worker_runs = {}
+_worker_runs_lock = threading.Lock()
+
+
+def _watch_cancel(queue: InterviewQueue, task: dict, control, role: str, done: threading.Event, withdrawn: threading.Event,
+                  poll: float):
+    """ Abandon the interview once the producer withdraws its task """
+    while not done.wait(poll):
+        try:
+            if queue.task_cancelled(task["task_id"]):
+                print(f"[WARNING] interview task {task['task_id']} ({role}) was withdrawn, abandoning it")
+                if not control.abandoned(role):
+                    withdrawn.set()
+                    control.abandon(role)
+                return
+        except Exception as e:
+            print(f"[WARNING] interview task {task['task_id']} cancel check failed: {e}")
+
+
+def run_task(task: dict, interview_graph, queue: Optional[InterviewQueue] = None, poll: float = 1.0) -> dict:
+    """
+    Worker side: run one queued interview and build its result payload. With `queue`, the
+    task is polled every `poll` seconds and the interview abandoned if it is withdrawn
+    """
+    from .run_control import get_run_control, peek_run_control, release_run
+
+    thread_id = task["thread_id"]
+    config = {"configurable": {"thread_id": thread_id}}
+    with _worker_runs_lock:
+        # A worker in the producer's own process shares the run's control, ledger included
+        shared = thread_id not in _worker_runs and peek_run_control(thread_id) is not None
+        if not shared:
+            _worker_runs[thread_id] = _worker_runs.get(thread_id, 0) + 1
+        control = get_run_control(config)
+    if task.get("deadline_in") is not None:
+        control.arm(max(task["deadline_in"], 0.001))
+    state = decode_interview(task["state"])
+    role = state["analyst"].role
+    done, withdrawn = threading.Event(), threading.Event()
+    if queue is not None:
+        threading.Thread(target=_watch_cancel, args=(queue, task, control, role, done, withdrawn, poll), daemon=True,
+                         name=f"interview-cancel-{task['task_id'][:8]}").start()
+    try:
+        result = interview_graph.invoke(state, config)
+        usage = None if shared else control.ledger.snapshot()["buckets"].get(role)
+        return {"sections": result.get("sections", []), "sources": result.get("sources", {}),
+                "interviews": result.get("interviews", {}), "token_usage": {role: usage} if usage else {}}
+    except Exception as e:
+        print(f"[ERROR] interview task {task['task_id']} ({role}) failed: {e}")
+        return {"error": f"{type(e).__name__}: {e}"}
+    finally:
+        done.set()
+        if withdrawn.is_set():
+            control.reinstate(role)
+        if not shared:
+            with _worker_runs_lock:
+                _worker_runs[thread_id] -= 1
+                if not _worker_runs[thread_id]:
+                    del _worker_runs[thread_id]
+                    release_run(thread_id)
+
+
+def serve(queue: InterviewQueue, interview_graph, stop: Optional[threading.Event] = None):
+    """ Worker loop: claim tasks and post results until `stop` is set """
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        task = queue.get_task(timeout=1.0)
+        if task is not None:
+            queue.put_result(task["task_id"], run_task(task, interview_graph, queue))
+
+
+def start_workers(queue: InterviewQueue, interview_graph, threads: int) -> threading.Event:
+    """ Serve `queue` from `threads` daemon threads in this process; set the returned event to stop them """
+    stop = threading.Event()
+    for i in range(threads):
+        threading.Thread(target=serve, args=(queue, interview_graph, stop), daemon=True, name=f"interview-worker-{i}").start()
+    return stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interview worker for a shared INTERVIEW_QUEUE")
+    parser.add_argument("mode", choices=["worker"])
+    parser.add_argument("--queue", default=os.environ.get("INTERVIEW_QUEUE", "sqlite:"))
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("INTERVIEW_WORKER_THREADS", 4)))
+    args = parser.parse_args()
+
+    from .env import load_env
+    load_env()
+    from .interview_builder import InterviewBuilder
+    from .llm import ModelRouter
+
+    queue = open_queue(args.queue)
+    graph = InterviewBuilder(ModelRouter()).build().compile(checkpointer=False)
+    print(f"[DEBUG] interview worker {os.getpid()} serving {args.queue} with {args.threads} threads")
+    stop = start_workers(queue, graph, args.threads)
+    try:
+        while not stop.wait(3600):
+            pass
+    except KeyboardInterrupt:
+        stop.set()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
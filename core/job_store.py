@@ -0,0 +1,141 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+
+QUEUED = "queued"
+CREATING_ANALYSTS = "creating_analysts"
+AWAITING_FEEDBACK = "awaiting_feedback"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# States after which a progress stream closes until the client acts again
+PAUSED_STATES = (AWAITING_FEEDBACK, COMPLETED, FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    thread_id TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    max_analysts INTEGER NOT NULL,
+    template TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_events (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    event TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_events_by_job ON job_events (job_id, event_id);
+"""
+
+
+class JobStore:
+    """
+    SQLite-backed job metadata and progress events, shared by every service worker
+    process. Each call opens its own short-lived connection, so the store is safe to
+    use from any thread or process.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """ One short transaction on a fresh connection """
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create(self, topic: str, max_analysts: int, template: Optional[str] = None) -> dict:
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "thread_id": str(uuid.uuid4()),
+            "topic": topic,
+            "max_analysts": max_analysts,
+            "template": template,
+            "status": QUEUED,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs VALUES (:job_id, :thread_id, :topic, :max_analysts, :template, :status, :error, :created_at, :updated_at)",
+                job,
+            )
+        self.add_event(job["job_id"], "status", {"status": QUEUED})
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def set_status(self, job_id: str, status: str, error: Optional[str] = None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE job_id = ?",
+                (status, error, time.time(), job_id),
+            )
+        payload = {"status": status}
+        if error:
+            payload["error"] = error
+        self.add_event(job_id, "status", payload)
+
+    def claim(self, job_id: str, from_status: str, to_status: str) -> bool:
+        """ Atomic status transition; False if another request already moved the job """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ? AND status = ?",
+                (to_status, time.time(), job_id, from_status),
+            )
+        if cursor.rowcount:
+            self.add_event(job_id, "status", {"status": to_status})
+        return bool(cursor.rowcount)
+
+    def add_event(self, job_id: str, event: str, data: dict):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO job_events (job_id, created_at, event, data) VALUES (?, ?, ?, ?)",
+                (job_id, time.time(), event, json.dumps(data, default=str)),
+            )
+
+    def events_after(self, job_id: str, after_id: int = 0, limit: int = 500):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT event_id, created_at, event, data FROM job_events WHERE job_id = ? AND event_id > ? ORDER BY event_id LIMIT ?",
+                (job_id, after_id, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def has_event(self, job_id: str, event: str, after_id: int = 0) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM job_events WHERE job_id = ? AND event = ? AND event_id > ? LIMIT 1", (job_id, event, after_id)
+            ).fetchone()
+        return row is not None
+
+    def last_event_id(self, job_id: str) -> int:
+        with self._connect() as conn:
+            row = conn.execute("SELECT MAX(event_id) FROM job_events WHERE job_id = ?", (job_id,)).fetchone()
+        return row[0] or 0
@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobRejected(Exception):
+    """ Raised by admission control when the queue or a session's quota is full """
+
+
+@dataclass(eq=False)
+class Job:
+    session_id: str
+    fn: Callable
+    args: tuple = ()
+    kwargs: dict = field(default_factory=dict)
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = QUEUED
+    result: Any = None
+    error: Optional[BaseException] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    _done: threading.Event = field(default_factory=threading.Event, repr=False)
+    _callbacks: list = field(default_factory=list, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def add_done_callback(self, callback: Callable[["Job"], None]):
+        """ Subscribe to completion; fires immediately if the job already finished """
+        run_now = False
+        with _callback_lock:
+            if self.finished:
+                run_now = True
+            else:
+                self._callbacks.append(callback)
+        if run_now:
+            callback(self)
+
+
+_callback_lock = threading.Lock()
+
+
+class JobExecutor:
+    """
+    Process-wide bounded worker pool for research jobs.
+
+    Each session has its own FIFO; workers take from sessions round-robin, so one
+    user queueing several jobs cannot starve the others. Admission control caps the
+    total queue depth and the number of unfinished jobs per session.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queued: int = 32, max_per_session: int = 2,
+                 finished_ttl: float = 3600):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_per_session = max_per_session
+        self.finished_ttl = finished_ttl
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._jobs = {}
+        self._cond = threading.Condition()
+        self._running = 0
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"research-job-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, session_id: str, fn: Callable, *args, **kwargs) -> Job:
+        with self._cond:
+            self._evict_finished()
+            queued = sum(len(q) for q in self._queues.values())
+            if queued >= self.max_queued:
+                raise JobRejected(f"Research queue is full ({queued} jobs waiting). Please retry shortly.")
+            active = sum(1 for j in self._jobs.values() if j.session_id == session_id and not j.finished)
+            if active >= self.max_per_session:
+                raise JobRejected(f"This session already has {active} research jobs in progress.")
+
+            job = Job(session_id=session_id, fn=fn, args=args, kwargs=kwargs)
+            self._jobs[job.job_id] = job
+            self._queues.setdefault(session_id, deque()).append(job)
+            self._cond.notify()
+            return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def position(self, job_id: str) -> int:
+        """ Approximate number of jobs ahead of `job_id` under round-robin scheduling; 0 once running """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return 0
+            queue = self._queues.get(job.session_id, deque())
+            rank = list(queue).index(job) if job in queue else 0
+            return sum(min(len(q), rank + 1) for q in self._queues.values()) - 1
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": self.max_workers,
+                "running": self._running,
+                "queued": sum(len(q) for q in self._queues.values()),
+                "sessions_waiting": sum(1 for q in self._queues.values() if q),
+            }
+
+    def _next_job(self) -> Optional[Job]:
+        """ Pop from the first non-empty session queue, then rotate that session to the back """
+        for session_id in list(self._queues):
+            queue = self._queues[session_id]
+            if queue:
+                job = queue.popleft()
+                self._queues.move_to_end(session_id)
+                if not queue:
+                    del self._queues[session_id]
+                return job
+            del self._queues[session_id]
+        return None
+
+    def _evict_finished(self):
+        cutoff = time.time() - self.finished_ttl
+        for job_id in [j.job_id for j in self._jobs.values() if j.finished and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next_job()
+                job.status = RUNNING
+                job.started_at = time.time()
+                self._running += 1
+
+            try:
+                job.result = job.fn(*job.args, **job.kwargs)
+                status = DONE
+            except BaseException as e:
+                print(f"[ERROR] research job {job.job_id} failed: {e}")
+                job.error = e
+                status = FAILED
+
+            with self._cond:
+                self._running -= 1
+            with _callback_lock:
+                job.finished_at = time.time()
+                job.status = status
+                callbacks, job._callbacks = job._callbacks, []
+            job._done.set()
+            for callback in callbacks:
+                try:
+                    callback(job)
+                except Exception as e:
+                    print(f"[ERROR] job callback failed: {e}")
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_job_executor() -> JobExecutor:
+    """ Process-wide executor shared by every Streamlit session """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = JobExecutor(
+                max_workers=int(os.environ.get("JOB_WORKERS", 4)),
+                max_queued=int(os.environ.get("JOB_MAX_QUEUED", 32)),
+                max_per_session=int(os.environ.get("JOB_MAX_PER_SESSION", 2)),
+            )
+        return _executor
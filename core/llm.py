@@ -0,0 +1,193 @@
+import itertools
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from .env import load_env
+from .hedging import hedged
+from .http_pool import get_http_client
+from .run_control import get_run_control
+from .token_budget import PLANNING, REDUCE
+
+load_env()
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+# Graph node -> model profile. Structured query extraction and routing decisions
+# go to the cheap/fast tier; answers, sections and the reduce phase keep the strong model.
+DEFAULT_NODE_PROFILES = {
+    "create_analysts": "strong",
+    "ask_question": "strong",
+    "search_web": "fast",
+    "search_wikipedia": "fast",
+    "search_local": "fast",
+    "answer_question": "strong",
+    "write_section": "strong",
+    "write_report": "strong",
+    "write_introduction": "strong",
+    "write_conclusion": "strong",
+    "write_report_expedited": "fast",
+    "summarize_history": "fast",
+}
+
+# Writer nodes may use the run's grace window after the interview deadline, so
+# interviews cut short still become sections and the report still gets written
+REDUCE_NODES = {"write_section", "write_report", "write_introduction", "write_conclusion", "write_report_expedited"}
+
+DEFAULT_TEMPERATURES = {"strong": 0.7, "fast": 0.0}
+
+# Process-wide cap on in-flight LLM calls across every run and session
+_llm_slots = threading.BoundedSemaphore(int(os.environ.get("LLM_MAX_CONCURRENCY", 16)))
+
+
+def _split_list(value):
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+@dataclass
+class ModelProfile:
+    """ Model name, sampling parameters and endpoint pool for one tier """
+    name: str
+    model: str
+    temperature: float
+    base_urls: List[str]
+    api_keys: List[str]
+    hedge_base_urls: List[str] = field(default_factory=list)
+    max_retries: int = 5
+    timeout: float = 60
+    extra: Dict = field(default_factory=dict)
+
+    @classmethod
+    def from_env(cls, name: str) -> "ModelProfile":
+        """
+        The "strong" profile reads the unprefixed variables (MODEL, OPENAI_BASE, NOVITA_API_KEY).
+        Any other profile reads <NAME>_MODEL, <NAME>_TEMPERATURE, <NAME>_OPENAI_BASE and
+        <NAME>_API_KEY, falling back to the strong settings for anything unset.
+        OPENAI_BASE values may be comma-separated to spread traffic across provider pools.
+        <PREFIX>HEDGE_OPENAI_BASE optionally names endpoints reserved for hedged duplicate calls.
+        """
+        prefix = "" if name == "strong" else f"{name.upper()}_"
+        model = os.environ.get(f"{prefix}MODEL") or os.environ["MODEL"]
+        temperature = os.environ.get(f"{prefix}TEMPERATURE")
+        if temperature is None:
+            temperature = DEFAULT_TEMPERATURES.get(name, DEFAULT_TEMPERATURES["strong"])
+        base_urls = _split_list(os.environ.get(f"{prefix}OPENAI_BASE")) or _split_list(os.environ["OPENAI_BASE"])
+        api_keys = _split_list(os.environ.get(f"{prefix}API_KEY")) or _split_list(os.environ["NOVITA_API_KEY"])
+        return cls(
+            name=name,
+            model=model,
+            temperature=float(temperature),
+            base_urls=base_urls,
+            api_keys=api_keys,
+            hedge_base_urls=_split_list(os.environ.get(f"{prefix}HEDGE_OPENAI_BASE")),
+            max_retries=int(os.environ.get(f"{prefix}MAX_RETRIES", 5)),
+            timeout=float(os.environ.get(f"{prefix}TIMEOUT", 60)),
+        )
+
+    def build_clients(self, base_urls: Optional[List[str]] = None) -> List["ChatOpenAI"]:
+        """
+        One client per base URL (default: the profile's pool); keys pair up by position,
+        or a single key is shared. All clients send through the process-wide pooled HTTP client.
+        """
+        from langchain_openai import ChatOpenAI
+
+        clients = []
+        for i, base_url in enumerate(base_urls or self.base_urls):
+            api_key = self.api_keys[i] if i < len(self.api_keys) else self.api_keys[0]
+            clients.append(ChatOpenAI(
+                model=self.model,
+                temperature=self.temperature,
+                openai_api_key=api_key,
+                openai_api_base=base_url,
+                max_retries=self.max_retries,
+                timeout=self.timeout,
+                http_client=get_http_client(),
+                **self.extra,
+            ))
+        return clients
+
+
+def get_llm(profile: str = "strong"):
+    """ Single client for a profile, pinned to its first base URL """
+    return ModelProfile.from_env(profile).build_clients()[0]
+
+
+class ModelRouter:
+    """
+    Resolves a graph node to its model profile and rotates calls across that
+    profile's endpoints. Overrides come from NODE_MODEL_PROFILES, e.g.
+    "ask_question=fast,write_report=strong".
+    """
+
+    def __init__(self, node_profiles: Optional[Dict[str, str]] = None):
+        self.node_profiles = dict(DEFAULT_NODE_PROFILES)
+        for pair in _split_list(os.environ.get("NODE_MODEL_PROFILES")):
+            node, _, profile = pair.partition("=")
+            self.node_profiles[node.strip()] = profile.strip()
+        self.node_profiles.update(node_profiles or {})
+        self._clients: Dict[str, List["ChatOpenAI"]] = {}
+        self._cycles = {}
+        self._hedge_cycles = {}
+        self._lock = threading.Lock()
+
+    def profile_for(self, node: str) -> str:
+        return self.node_profiles.get(node, "strong")
+
+    def _pool(self, profile: str):
+        with self._lock:
+            if profile not in self._clients:
+                settings = ModelProfile.from_env(profile)
+                self._clients[profile] = settings.build_clients()
+                self._cycles[profile] = itertools.cycle(self._clients[profile])
+                hedge_clients = settings.build_clients(settings.hedge_base_urls) if settings.hedge_base_urls else None
+                self._hedge_cycles[profile] = itertools.cycle(hedge_clients) if hedge_clients else None
+            return self._cycles[profile]
+
+    def for_profile(self, profile: str) -> "ChatOpenAI":
+        """ Next client in the profile's round-robin """
+        cycle = self._pool(profile)
+        with self._lock:
+            return next(cycle)
+
+    def for_node(self, node: str) -> "ChatOpenAI":
+        return self.for_profile(self.profile_for(node))
+
+    def for_hedge(self, node: str) -> "ChatOpenAI":
+        """ Client for a hedged duplicate: the profile's hedge endpoints, else the next one in its round-robin """
+        profile = self.profile_for(node)
+        cycle = self._pool(profile)
+        with self._lock:
+            return next(self._hedge_cycles[profile] or cycle)
+
+    def invoke(self, node: str, messages, config=None, bucket=None):
+        """
+        Invoke the model configured for `node`, waiting for a process-wide LLM slot.
+        Slow calls to nodes listed in HEDGE_NODES are hedged with a duplicate request.
+        With a run `config`, the call is bounded by that run's deadline and cancellation token
+        and its token usage is charged to `bucket` in the run's ledger.
+        """
+        control = get_run_control(config) if config is not None else None
+        hard = node in REDUCE_NODES
+        kwargs = {}
+        if control is not None:
+            remaining = control.remaining(hard)
+            if remaining is not None:
+                kwargs["timeout"] = max(1.0, remaining)
+
+        def attempt(client_for):
+            with _llm_slots:
+                return client_for(node).invoke(messages, **kwargs)
+
+        def call():
+            return hedged("llm", node, lambda: attempt(self.for_node), lambda: attempt(self.for_hedge))
+
+        if control is None:
+            return call()
+        if control.cassette is not None:
+            recorded_call = call
+            call = lambda: control.cassette.call("llm", node, {"messages": messages}, recorded_call)
+        response = control.run(call, hard=hard)
+        control.ledger.record(bucket or (REDUCE if hard else PLANNING), response)
+        return response
@@ -0,0 +1,288 @@
+"""
+Local corpus retrieval over an on-disk BM25 index.
+
+The index is built offline from a directory of text/markdown/HTML files:
+
+    python -m core.local_corpus build <docs_dir> <index_dir>
+    python -m core.local_corpus query <index_dir> "search terms"
+
+Layout of <index_dir> (all little-endian, read through mmap without parsing):
+    meta.json      counts and BM25 parameters
+    lexicon.bin    fixed-width entries sorted by term: term_offset u64, term_len u32, df u32, postings_offset u64
+    terms.bin      concatenated UTF-8 terms referenced by the lexicon
+    postings.bin   per term: df doc ids (u32) followed by df impacts (u8), ordered by impact descending
+    passages.idx   u64 offsets into passages.bin (one extra trailing offset)
+    passages.bin   UTF-8 "source\\x1ftitle\\x1ftext" records
+
+Impacts are BM25 term scores (idf included) quantized to a byte at build time, so a
+query is a sum of impacts over a bounded prefix of each postings list.
+"""
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from collections import Counter, defaultdict
+from html.parser import HTMLParser
+from typing import Dict
+
+from .text_scoring import split_passages, tokenize
+
+INDEX_VERSION = 2
+LEXICON_ENTRY = struct.Struct("<QIIQ")
+CORPUS_EXTENSIONS = {".txt", ".md", ".markdown", ".html", ".htm"}
+
+
+class _TextExtractor(HTMLParser):
+    """ Visible text from an HTML page, keeping block boundaries as blank lines """
+
+    BLOCK_TAGS = {"p", "div", "section", "article", "li", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "br", "pre"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self.title = ""
+        self._skip = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style", "noscript"):
+            self._skip += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n\n")
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style", "noscript") and self._skip:
+            self._skip -= 1
+        elif tag == "title":
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        if self._in_title:
+            self.title += data
+        else:
+            self.parts.append(data)
+
+
+def read_document(path: str):
+    """ Return (title, text) for a corpus file """
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        raw = f.read()
+    if path.lower().endswith((".html", ".htm")):
+        parser = _TextExtractor()
+        parser.feed(raw)
+        text = "".join(parser.parts)
+        title = parser.title.strip()
+    else:
+        text = raw
+        title = ""
+    if not title:
+        heading = re.search(r"^#\s+(.+)$", text, re.MULTILINE)
+        title = heading.group(1).strip() if heading else os.path.splitext(os.path.basename(path))[0]
+    return title, text
+
+
+def iter_corpus_files(root: str):
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if os.path.splitext(name)[1].lower() in CORPUS_EXTENSIONS:
+                yield os.path.join(dirpath, name)
+
+
+def build_index(docs_dir: str, index_dir: str, k1: float = 1.2, b: float = 0.75, passage_chars: int = 800):
+    """ Build the mmap-able BM25 index for every corpus file under `docs_dir` """
+    os.makedirs(index_dir, exist_ok=True)
+    postings: Dict[str, list] = defaultdict(list)
+    doc_lens = []
+
+    with open(os.path.join(index_dir, "passages.bin"), "wb") as passages_f, \
+            open(os.path.join(index_dir, "passages.idx"), "wb") as offsets_f:
+        offset = 0
+        for path in iter_corpus_files(docs_dir):
+            title, text = read_document(path)
+            source = os.path.relpath(path, docs_dir)
+            for passage in split_passages(text, passage_chars):
+                tokens = tokenize(f"{title} {passage}")
+                if not tokens:
+                    continue
+                doc_id = len(doc_lens)
+                doc_lens.append(len(tokens))
+                for term, tf in Counter(tokens).items():
+                    postings[term].append((doc_id, tf))
+                record = f"{source}\x1f{title}\x1f{passage}".encode("utf-8")
+                offsets_f.write(struct.pack("<Q", offset))
+                passages_f.write(record)
+                offset += len(record)
+        offsets_f.write(struct.pack("<Q", offset))
+
+    num_docs = len(doc_lens)
+    avgdl = (sum(doc_lens) / num_docs) if num_docs else 0.0
+
+    # BM25 score for every (term, passage), then one global scale for byte quantization
+    scored = {}
+    max_score = 0.0
+    for term, plist in postings.items():
+        df = len(plist)
+        idf = math.log(1 + (num_docs - df + 0.5) / (df + 0.5))
+        entries = []
+        for doc_id, tf in plist:
+            norm = tf + k1 * (1 - b + b * doc_lens[doc_id] / avgdl)
+            score = idf * tf * (k1 + 1) / norm
+            entries.append((score, doc_id))
+            max_score = max(max_score, score)
+        scored[term] = entries
+    scale = 255.0 / max_score if max_score else 1.0
+
+    with open(os.path.join(index_dir, "lexicon.bin"), "wb") as lex_f, \
+            open(os.path.join(index_dir, "terms.bin"), "wb") as terms_f, \
+            open(os.path.join(index_dir, "postings.bin"), "wb") as post_f:
+        term_offset = 0
+        post_offset = 0
+        for term in sorted(scored, key=lambda t: t.encode("utf-8")):
+            entries = sorted(scored[term], reverse=True)
+            term_bytes = term.encode("utf-8")
+            doc_ids = struct.pack(f"<{len(entries)}I", *(d for _, d in entries))
+            impacts = bytes(max(1, min(255, round(s * scale))) for s, _ in entries)
+            lex_f.write(LEXICON_ENTRY.pack(term_offset, len(term_bytes), len(entries), post_offset))
+            terms_f.write(term_bytes)
+            post_f.write(doc_ids)
+            post_f.write(impacts)
+            term_offset += len(term_bytes)
+            post_offset += len(doc_ids) + len(impacts)
+
+    meta = {
+        "version": INDEX_VERSION,
+        "num_passages": num_docs,
+        "num_terms": len(scored),
+        "avgdl": avgdl,
+        "k1": k1,
+        "b": b,
+        "scale": scale,
+    }
+    with open(os.path.join(index_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class LocalCorpusIndex:
+    """ Read-only view over a built index; opening only maps the files """
+
+    def __init__(self, index_dir: str, max_postings_per_term: int = 50000):
+        with open(os.path.join(index_dir, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported local corpus index version: {self.meta.get('version')}")
+        if sys.byteorder != "little":
+            raise ValueError("Local corpus index requires a little-endian platform")
+        self.max_postings_per_term = max_postings_per_term
+        self._files = []
+        self._lexicon = self._map(index_dir, "lexicon.bin")
+        self._terms = self._map(index_dir, "terms.bin")
+        self._postings = self._map(index_dir, "postings.bin")
+        self._passages = self._map(index_dir, "passages.bin")
+        self._offsets = self._map(index_dir, "passages.idx").cast("Q")
+        self.num_terms = self.meta["num_terms"]
+
+    def _map(self, index_dir, name):
+        f = open(os.path.join(index_dir, name), "rb")
+        self._files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(b"")
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def _lookup(self, term: str):
+        """ Binary search the sorted lexicon; returns (df, postings_offset) or None """
+        target = term.encode("utf-8")
+        lo, hi = 0, self.num_terms - 1
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            t_off, t_len, df, p_off = LEXICON_ENTRY.unpack_from(self._lexicon, mid * LEXICON_ENTRY.size)
+            candidate = bytes(self._terms[t_off:t_off + t_len])
+            if candidate == target:
+                return df, p_off
+            if candidate < target:
+                lo = mid + 1
+            else:
+                hi = mid - 1
+        return None
+
+    def passage(self, doc_id: int):
+        start, end = self._offsets[doc_id], self._offsets[doc_id + 1]
+        source, title, text = bytes(self._passages[start:end]).decode("utf-8").split("\x1f", 2)
+        return {"source": source, "title": title, "content": text}
+
+    def search(self, query: str, k: int = 3):
+        """ Top-k passages by summed impact; each postings list is read up to the configured prefix """
+        scores = defaultdict(int)
+        for term in set(tokenize(query)):
+            entry = self._lookup(term)
+            if entry is None:
+                continue
+            df, p_off = entry
+            n = min(df, self.max_postings_per_term)
+            doc_ids = self._postings[p_off:p_off + 4 * df].cast("I")[:n]
+            impacts = self._postings[p_off + 4 * df:p_off + 5 * df][:n]
+            for doc_id, impact in zip(doc_ids, impacts):
+                scores[doc_id] += impact
+
+        results = []
+        for doc_id, score in heapq.nlargest(k, scores.items(), key=lambda item: item[1]):
+            hit = self.passage(doc_id)
+            hit["score"] = score / self.meta["scale"]
+            hit["passage_id"] = doc_id
+            results.append(hit)
+        return results
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_local_index(index_dir: str) -> LocalCorpusIndex:
+    """ Process-wide cache of opened indexes """
+    with _indexes_lock:
+        if index_dir not in _indexes:
+            _indexes[index_dir] = LocalCorpusIndex(
+                index_dir,
+                max_postings_per_term=int(os.environ.get("LOCAL_CORPUS_MAX_POSTINGS", 50000)),
+            )
+        return _indexes[index_dir]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build or query a local corpus BM25 index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="Index a directory of .txt/.md/.html files")
+    build_cmd.add_argument("docs_dir")
+    build_cmd.add_argument("index_dir")
+    build_cmd.add_argument("--passage-chars", type=int, default=800)
+    query_cmd = sub.add_parser("query", help="Run a query against a built index")
+    query_cmd.add_argument("index_dir")
+    query_cmd.add_argument("query")
+    query_cmd.add_argument("-k", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        meta = build_index(args.docs_dir, args.index_dir, passage_chars=args.passage_chars)
+        print(f"Indexed {meta['num_passages']} passages / {meta['num_terms']} terms in {time.perf_counter() - start:.1f}s")
+    else:
+        start = time.perf_counter()
+        index = LocalCorpusIndex(args.index_dir)
+        loaded = time.perf_counter()
+        hits = index.search(args.query, k=args.k)
+        done = time.perf_counter()
+        for hit in hits:
+            print(f"{hit['score']:.2f}  {hit['source']}  {hit['title']}\n    {hit['content'][:160]}")
+        print(f"load {1000 * (loaded - start):.2f} ms, query {1000 * (done - loaded):.2f} ms")
@@ -0,0 +1,211 @@
+"""
+Opt-in CPU and memory profiling for graph nodes and exporters.
+
+    PROFILE_NODES=answer_question,write_section,generate_pptx   (or "all")
+    PROFILE_MODE=sample      stack sampling -> <node>.collapsed (flamegraph.pl / speedscope input)
+    PROFILE_MODE=cprofile    cProfile -> <node>.<n>.prof (pstats / snakeviz)
+    PROFILE_MEMORY=1         tracemalloc: top allocating lines per call -> allocations.txt
+
+Output goes to PROFILE_DIR/<thread_id>/ (exporters use PROFILE_DIR/exports/).
+Unlisted nodes are not wrapped at all, so profiling costs nothing unless enabled.
+
+Sampling also covers the deadline and hedge pool threads running a node's calls
+(submitted through `follow`); their stacks appear under the pool's thread name.
+cProfile allows one active profiler per process, so a node that starts while
+another node is being profiled is skipped with a warning.
+"""
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILE_NODES = {n.strip() for n in os.environ.get("PROFILE_NODES", "").split(",") if n.strip()}
+PROFILE_MODE = os.environ.get("PROFILE_MODE", "sample").lower()
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL_MS", 5)) / 1000
+PROFILE_MEMORY = os.environ.get("PROFILE_MEMORY", "0") == "1"
+PROFILE_TOP_ALLOCATIONS = int(os.environ.get("PROFILE_TOP_ALLOCATIONS", 15))
+
+_write_lock = threading.Lock()
+_call_ids = itertools.count()
+_cprofile_lock = threading.Lock()
+# Thread ident -> the sampler of the node whose work that thread is running
+_followed = {}
+
+
+def enabled(name: str) -> bool:
+    return "all" in PROFILE_NODES or name in PROFILE_NODES
+
+
+class _StackSampler(threading.Thread):
+    """
+    Samples a node's thread, and the worker threads currently running its calls, every
+    `interval` seconds into collapsed-stack counts. Worker stacks are prefixed with the pool name
+    """
+
+    def __init__(self, target_ident: int, interval: float):
+        super().__init__(daemon=True, name="profile-sampler")
+        self.target_ident = target_ident
+        self.interval = interval
+        self.counts = Counter()
+        self._workers = {}
+        self._lock = threading.Lock()
+        self._halt = threading.Event()
+
+    def add_worker(self, ident: int, name: str):
+        with self._lock:
+            # "deadline-call_3" -> "deadline-call", so a pool's threads share one flame
+            self._workers[ident] = name.rsplit("_", 1)[0]
+
+    def remove_worker(self, ident: int):
+        with self._lock:
+            self._workers.pop(ident, None)
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                targets = [(self.target_ident, None)] + list(self._workers.items())
+            for ident, prefix in targets:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if stack:
+                    self.counts[";".join(([prefix] if prefix else []) + stack[::-1])] += 1
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+
+def follow(fn):
+    """
+    `fn` for submission to a worker pool: if the submitting thread is being sampled, the
+    worker thread is sampled into the same node while it runs `fn`. Otherwise `fn` itself
+    """
+    sampler = _followed.get(threading.get_ident())
+    if sampler is None:
+        return fn
+
+    def run(*args, **kwargs):
+        ident = threading.get_ident()
+        sampler.add_worker(ident, threading.current_thread().name)
+        _followed[ident] = sampler
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _followed.pop(ident, None)
+            sampler.remove_worker(ident)
+    return run
+
+
+def _run_dir(run_id: str) -> str:
+    path = os.path.join(PROFILE_DIR, str(run_id))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _append(path: str, text: str):
+    with _write_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(text)
+
+
+@contextmanager
+def profile_block(name: str, run_id: str = "exports"):
+    """ Profile the enclosed code as one call of `name` """
+    import cProfile
+    import tracemalloc
+
+    out_dir = _run_dir(run_id)
+    if PROFILE_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start(int(os.environ.get("PROFILE_TRACEBACK_DEPTH", 1)))
+    own_allocations = [tracemalloc.Filter(False, __file__)]
+    before = tracemalloc.take_snapshot().filter_traces(own_allocations) if PROFILE_MEMORY else None
+
+    profiler = sampler = None
+    if PROFILE_MODE == "cprofile":
+        if _cprofile_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as e:
+                # Python 3.12+: a debugger or coverage tool already holds the profiling hook
+                print(f"[WARNING] profiling - {name} not profiled: {e}")
+                profiler = None
+                _cprofile_lock.release()
+        else:
+            print(f"[WARNING] profiling - {name} not profiled: another node's cProfile session is active")
+    else:
+        sampler = _StackSampler(threading.get_ident(), PROFILE_INTERVAL)
+        outer = _followed.get(threading.get_ident())
+        _followed[threading.get_ident()] = sampler
+        sampler.start()
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if profiler is not None:
+            profiler.disable()
+            _cprofile_lock.release()
+            profiler.dump_stats(os.path.join(out_dir, f"{name}.{next(_call_ids)}.prof"))
+        if sampler is not None:
+            if outer is not None:
+                _followed[threading.get_ident()] = outer
+            else:
+                _followed.pop(threading.get_ident(), None)
+            sampler.stop()
+            _append(os.path.join(out_dir, f"{name}.collapsed"),
+                    "".join(f"{name};{stack} {count}\n" for stack, count in sampler.counts.items()))
+        if before is not None:
+            # Concurrent nodes share the tracer, so parallel branches show up in each other's diffs
+            stats = tracemalloc.take_snapshot().filter_traces(own_allocations).compare_to(before, "lineno")[:PROFILE_TOP_ALLOCATIONS]
+            current, peak = tracemalloc.get_traced_memory()
+            lines = [f"== {name} ({elapsed:.3f}s, traced {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB)"]
+            lines += [f"  {stat}" for stat in stats]
+            _append(os.path.join(out_dir, "allocations.txt"), "\n".join(lines) + "\n")
+
+
+def _run_id(config) -> str:
+    return ((config or {}).get("configurable") or {}).get("thread_id", "default")
+
+
+def profiled(name: str, node):
+    """ Graph node `node` profiled under `name` when enabled; otherwise `node` itself """
+    if not enabled(name):
+        return node
+    import inspect
+
+    takes_config = "config" in inspect.signature(node).parameters
+
+    # Deliberately not functools.wraps: LangGraph must see this wrapper's (state, config) signature
+    def wrapper(state, config):
+        with profile_block(name, _run_id(config)):
+            return node(state, config) if takes_config else node(state)
+
+    wrapper.__name__ = getattr(node, "__name__", name)
+    return wrapper
+
+
+def profile_call(name: str):
+    """ Decorator for non-node hot spots such as exporters """
+    def decorator(fn):
+        if not enabled(name):
+            return fn
+
+        def wrapper(*args, **kwargs):
+            with profile_block(name):
+                return fn(*args, **kwargs)
+
+        wrapper.__name__ = fn.__name__
+        wrapper.__doc__ = fn.__doc__
+        return wrapper
+    return decorator
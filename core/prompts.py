@@ -21,6 +21,15 @@ Your goal is to ensure a multi-dimensional and comprehensive investigation into
 - Every persona feels like a distinct, high-level expert.
 - The team as a whole covers technical, social, and economic/practical dimensions of the topic."""
 
+analyst_revision_instructions = """
+
+### Current Team:
+The team below was already proposed, and some analysts may already have finished their research.
+Revise it according to the editorial feedback: keep every analyst the feedback does not concern EXACTLY as written
+(identical role and description, word for word) and only add, remove or rewrite the analysts the feedback asks to change.
+
+{analysts}"""
+
 
 
 
@@ -45,6 +54,23 @@ Professional, inquisitive, and respectful, yet persistent in seeking depth."""
 
 
 
+history_summary_instructions = """You maintain the running summary of a technical interview between an analyst and a domain expert.
+
+### Summary So Far:
+{summary}
+
+### Earlier Turns to Fold In:
+{turns}
+
+Rewrite the summary so it also covers the turns above. Keep every concrete fact, figure, named technique, open question and document id citation (e.g. [S3f9a2c]); drop pleasantries and repetition. Write compact bullet points, at most {max_words} words, with no preamble."""
+
+
+batched_question_instructions = """
+
+### Batched Turn:
+Ask {k} distinct, numbered sub-questions (1., 2., ...) in this single message. Each should probe a different gap, so the expert can answer them together."""
+
+
 search_instructions = SystemMessage(content=f"""You are a Search Optimization Expert. 
 Your goal is to transform a complex conversation into a precision-engineered search query for technical retrieval.
 
@@ -53,6 +79,16 @@ Your goal is to transform a complex conversation into a precision-engineered sea
 3. **Query Engineering**: Don't just copy the question. Use professional terminology, technical keywords, and Boolean-style structure if helpful to maximize retrieval relevance.""")
 
 
+batched_search_instructions = """
+
+The analyst's latest message contains up to {k} numbered questions. Return one query per question, in order, in `queries`, and the query for the first question in `search_query`."""
+
+
+reformulation_search_instructions = """
+
+Also rephrase each query {n} ways in total (the original plus alternatives using synonyms, more specific technical terms or a broader framing) and return all of them in `queries`, so retrieval does not hinge on one wording."""
+
+
 
 
 answer_instructions = """You are a world-class domain expert specializing in {goals}.
@@ -72,9 +108,9 @@ Provide the analyst with a detailed, technical, and accurate response based *str
    - **Bullet Clarity**: Use concise and well-structured bullet points for lists.
 4. **Meticulous Citation**: 
    - Every claim must be supported by a citation. 
-   - Use bracketed notation, e.g., "The integration of X significantly reduced latency [1]."
-   - If a source is `<Document source="path/to/file.pdf" page="5"/>`, cite as [1] path/to/file.pdf, page 5.
-5. **Source Listing**: List all cited sources at the bottom of your response in a clear, numbered list. Do not duplicate sources."""
+   - Cite with the id of the supporting document in square brackets, e.g., "The integration of X significantly reduced latency [S3f9a2c]."
+   - For a source `<Document id="S3f9a2c" title="..."/>`, the citation is [S3f9a2c].
+5. **No Source Listing**: Do not list sources at the end; the ids are resolved to a Sources list automatically."""
 
 
 
@@ -101,8 +137,8 @@ Your goal is to synthesize raw expert interviews into a polished, executive-leve
    - **Use Callouts**: Highlight key findings or critical "Golden Nuggets" using Markdown blockquotes (e.g., `> **Key Finding:** ...`).
    - **Bullet Clarity**: Use concise, high-impact bullet points for technical breakdowns.
 4. **Technical Precision**: Incorporate technical terms and specific data points gathered during the interview.
-5. **Citations**: Use numbered citations [1], [2] throughout. Ensure every significant claim is cited.
-6. **Verified Sources (### Sources)**: List every used source once. Provide full links or paths. 
+5. **Citations**: Cite with the document ids from the sources, in square brackets (e.g., [S3f9a2c]). Ensure every significant claim is cited.
+6. **No Sources Section**: Do not write a Sources or References list; ids are resolved to one automatically.
 
 ### Style Guide:
 - No first-person references ("I think").
@@ -126,8 +162,8 @@ You have been provided with technical memos from a specialized team of expert an
 ### Formatting & Style:
 - Use Professional Markdown.
 {template}
-- **Citation Integrity**: You MUST preserve and carry forward all source citations from the memos (e.g., [1], [2]).
-- **Consolidated Sources**: Create a final `## Sources` section at the end of the report. Deduplicate any sources used across different memos. Ensure they are listed in order.
+- **Citation Integrity**: You MUST preserve and carry forward the source id citations from the memos exactly as written (e.g., [S3f9a2c]).
+- **No Sources Section**: Do not write a Sources or References list; the ids are resolved to a numbered Sources section automatically.
 
 ### Perspective:
 Write for an audience of industry leaders and technical decision-makers. Tone should be objective, future-oriented, and highly authoritative."""
@@ -162,4 +198,7 @@ Write a powerful, executive-level Introduction or Conclusion as requested.
    - Write a ## Conclusion section (approx. 100-150 words).
    - Synthesize the final "verdict": What is the ultimate takeaway? What are the future implications?
 3. **Professionalism**: No conversational preamble. Use formal, technical language.
-4. **Markdown**: Ensure perfect formatting."""
\ No newline at end of file
+4. **Markdown**: Ensure perfect formatting."""
+
+
+batched_answer_instructions = " The analyst asked several numbered questions: answer each one in turn under its number."
@@ -0,0 +1,84 @@
+"""
+Refresh of a finished run: re-check its evidence and redo only what changed.
+
+Every interview records the queries it searched and the content hashes of the
+results. A refresh re-runs each distinct (backend, query) once against the live
+backend and compares the hashes. Analysts with new or changed results get their
+cached interview dropped. The resumed run then interviews only those analysts and
+rewrites the report from their new sections plus everyone else's cached ones.
+Those interviews bypass research memory's stored sections and passages, which are
+what went stale; their fresh results are stored again. When nothing changed, the
+run is left as it is and no model is called.
+"""
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from .evidence import describe
+
+# Analysts from runs that predate search logging (or recalled from research memory) have nothing to compare
+UNKNOWN = "no recorded searches"
+
+
+def content_hashes(results) -> List[str]:
+    """ Sorted content hashes of one query's results; order and duplicates don't count as change """
+    if not isinstance(results, list):
+        return []
+    hashes = set()
+    for result in results:
+        described = describe(result)
+        if described is not None:
+            hashes.add(hashlib.sha1(f"{described['url']}\x1f{described['content']}".encode("utf-8")).hexdigest()[:16])
+    return sorted(hashes)
+
+
+def plan_refresh(analysts, interviews: dict, backend, max_workers: int = 8) -> dict:
+    """
+    Which of `analysts` need a new interview. `backend(node)` returns the live search
+    function of a search node. Returns {"changed": {fingerprint: reason}, "searches": n, "changed_queries": n}
+    """
+    recorded = {}
+    for analyst in analysts:
+        for search in (interviews.get(analyst.fingerprint) or {}).get("searches", []):
+            recorded.setdefault((search["node"], search["query"]), set()).add(tuple(search["hashes"]))
+
+    def fetch(key):
+        node, query = key
+        try:
+            return tuple(content_hashes(backend(node)(query)))
+        except Exception as e:
+            print(f"[WARNING] refresh - {node} '{query}' failed, treating it as unchanged: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="refresh-search") as pool:
+        current = dict(zip(recorded, pool.map(fetch, recorded)))
+    changed_queries = {key for key, hashes in current.items() if hashes is not None and any(hashes != old for old in recorded[key])}
+
+    changed = {}
+    for analyst in analysts:
+        searches = (interviews.get(analyst.fingerprint) or {}).get("searches")
+        if not searches:
+            changed[analyst.fingerprint] = UNKNOWN
+            continue
+        queries = [s["query"] for s in searches if (s["node"], s["query"]) in changed_queries]
+        if queries:
+            changed[analyst.fingerprint] = f"new results for {', '.join(dict.fromkeys(queries))}"
+    for fp, reason in changed.items():
+        print(f"[DEBUG] refresh - re-interviewing {interviews.get(fp, {}).get('role', fp)}: {reason}")
+    print(f"[DEBUG] refresh - {len(recorded)} searches re-run, {len(changed_queries)} changed, {len(changed)}/{len(analysts)} analysts to re-interview")
+    return {"changed": changed, "searches": len(recorded), "changed_queries": len(changed_queries)}
+
+
+def prepare_refresh(graph, builder, config) -> dict:
+    """
+    Plan a refresh of the finished run at `config` and, if any analyst's evidence changed,
+    drop those interviews and leave the graph ready to resume (graph.invoke(None, config))
+    """
+    values = graph.get_state(config).values
+    if not values.get("final_report"):
+        raise ValueError("Only a finished run can be refreshed")
+    plan = plan_refresh(values.get("analysts", []), values.get("interviews") or {}, builder.backend)
+    if plan["changed"]:
+        graph.update_state(config, {"human_analyst_feedback": None, "interviews": {fp: None for fp in plan["changed"]},
+                                    "refreshing": list(plan["changed"])}, as_node="human_feedback")
+    return plan
@@ -1,7 +1,4 @@
-import os
-from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage
-from langchain_openai import ChatOpenAI 
 from .interview_builder import Analyst, InterviewBuilder
 
 import operator
@@ -15,20 +12,35 @@ from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langgraph.graph import START, END, StateGraph
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.types import RetryPolicy
+from langchain_core.runnables import RunnableConfig
 from .utils import sanitize_messages
+from .llm import ModelRouter
+from .run_control import RunCancelled, get_run_control, release_run
+from .profiling import profiled
+from .interview_queue import InterviewExecutor, RemoteInterviewError, open_queue, start_workers
+from .speculation import get_speculation
+from .sources import merge_sources, render_citations, strip_source_listings
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from langgraph.config import get_stream_writer
+
+
+def merge_interviews(left: dict, right: dict) -> dict:
+    """
+    Reducer for finished interviews keyed by analyst fingerprint; they survive feedback rounds.
+    A None entry drops that interview, so the analyst is interviewed again (refresh)
+    """
+    merged = {**(left or {}), **(right or {})}
+    return {fp: interview for fp, interview in merged.items() if interview is not None}
+
 
-load_dotenv()
-def get_llm():
-    llm = ChatOpenAI(
-        model=os.environ["MODEL"], 
-        temperature=0.7,
-        openai_api_key=os.environ["NOVITA_API_KEY"],
-        openai_api_base=os.environ["OPENAI_BASE"],
-        max_retries=5,
-        timeout=60,
-    )
+def interview_outputs(result: dict) -> dict:
+    """ The parts of a finished InterviewState that flow back into the research graph """
+    return {key: result[key] for key in ("sections", "sources", "interviews") if key in result}
 
-    return llm 
 
 class ResearchGraphState(TypedDict):
     topic: str
@@ -36,21 +48,84 @@ class ResearchGraphState(TypedDict):
     human_analyst_feedback: str
     analysts: List[Analyst] 
     sections: Annotated[list, operator.add]
+    sources: Annotated[dict, merge_sources]
+    interviews: Annotated[dict, merge_interviews]
+    refreshing: list
     introduction: str
     content: str
     conclusion: str
     final_report: str
+    token_usage: dict
 
 class ResearchAgent:
-    def __init__(self, templatePrompt):
-        self.llm = get_llm()
+    def __init__(self, templatePrompt, run_deadline=None, token_budget=None):
+        self.models = ModelRouter()
+        # Seconds from analyst approval to the start of the expedited reduce; None disables the deadline
+        self.run_deadline = run_deadline if run_deadline is not None else float(os.environ.get("RUN_DEADLINE_SECONDS", 0)) or None
+        # Run-wide token ceiling that drives interview turn scheduling; None keeps fixed turns
+        self.token_budget = token_budget if token_budget is not None else int(os.environ.get("RUN_TOKEN_BUDGET", 0)) or None
         self.templatePrompt = templatePrompt
         self.report_writer_instructions = report_writer_instructions
         self.intro_conclusion_instructions = intro_conclusion_instructions
-        self.interview_builder = InterviewBuilder(self.llm)
+        self.interview_builder = InterviewBuilder(self.models)
+        # Straggler cutoff: reduce once INTERVIEW_QUORUM of the analysts are done (plus a grace
+        # window for late sections) or after INTERVIEW_STRAGGLER_TIMEOUT seconds
+        self.interview_quorum = float(os.environ.get("INTERVIEW_QUORUM", 1.0))
+        self.straggler_grace = float(os.environ.get("INTERVIEW_STRAGGLER_GRACE", 30))
+        self.straggler_timeout = float(os.environ.get("INTERVIEW_STRAGGLER_TIMEOUT", 0))
+        self.quorum_mode = self.interview_quorum < 1.0 or self.straggler_timeout > 0
+        # Large fan-out: at most this many interviews in flight, the rest wait in a sliding window (0 = all at once)
+        self.max_in_flight = int(os.environ.get("INTERVIEW_MAX_IN_FLIGHT", 0))
+        self.pool_mode = self.quorum_mode or self.max_in_flight > 0
+        self.interview_graph = None
+        # Distributed interviews: ship each InterviewState to workers over INTERVIEW_QUEUE
+        queue_url = os.environ.get("INTERVIEW_QUEUE", "").strip()
+        self.interview_executor = InterviewExecutor(open_queue(queue_url)) if queue_url else None
+        self.local_interview_workers = int(os.environ.get("INTERVIEW_LOCAL_WORKERS", 4 if queue_url == "local" else 0))
+        self.interview_queue_timeout = float(os.environ.get("INTERVIEW_QUEUE_TIMEOUT", 0)) or None
+        self._workers_stop = None
+        # Speculative interviews started while the analysts are under review (SPECULATIVE_INTERVIEWS=1)
+        self.speculation = get_speculation()
+
+
+    @staticmethod
+    def pending_analysts(state: ResearchGraphState) -> List[Analyst]:
+        """ Analysts without a finished interview: new or changed personas """
+        done = state.get("interviews") or {}
+        return [analyst for analyst in state["analysts"] if analyst.fingerprint not in done]
+
+
+    @staticmethod
+    def run_sections(state: ResearchGraphState) -> list:
+        """ Sections of the current analysts, cached or new, in analyst order """
+        interviews = state.get("interviews")
+        if not interviews:
+            return state.get("sections", [])
+        return [section for analyst in state.get("analysts", []) for section in interviews.get(analyst.fingerprint, {}).get("sections", [])]
+
+
+    @staticmethod
+    def opening(analyst: Analyst, topic: str, refreshing=()) -> dict:
+        """ Initial InterviewState for one analyst; one listed in `refreshing` bypasses research memory """
+        interview = {"analyst": analyst, "article_topic": topic,
+                     "messages": [HumanMessage(content=f"So you said you were writing an article on {topic}?")]}
+        if analyst.fingerprint in refreshing:
+            interview["refresh"] = True
+        return interview
+
+
+    def create_analysts(self, state: ResearchGraphState, config: RunnableConfig):
+        """ Propose the analysts and, in speculative mode, start their interviews before the review """
+        result = self.interview_builder.create_analysts(state, config)
+        if self.speculation is not None:
+            topic = state["topic"]
+            self.speculation.start(config["configurable"]["thread_id"], self.pending_analysts({**state, **result}),
+                                   lambda analyst, spec_config: self.interview_graph.invoke(self.opening(analyst, topic), spec_config),
+                                   recursion_limit=config.get("recursion_limit", 25))
+        return result
 
 
-    def initiate_all_interviews(self, state: ResearchGraphState):
+    def initiate_all_interviews(self, state: ResearchGraphState, config: RunnableConfig):
         """ This is the "map" step where we run each interview sub-graph using Send API """
 
         human_analyst_feedback=state.get('human_analyst_feedback')
@@ -59,99 +134,260 @@ class ResearchAgent:
             return "create_analysts"
 
         else:
+            # The deadline clock starts once the analysts are approved
+            control = get_run_control(config)
+            control.arm(self.run_deadline)
+            control.ledger.set_budget(self.token_budget)
             topic = state["topic"]
-            return [Send("conduct_interview", {"analyst": analyst,
-                                            "messages": [HumanMessage(
-                                                content=f"So you said you were writing an article on {topic}?"
-                                            )
-                                                        ]}) for analyst in state["analysts"]]
+            pending = self.pending_analysts(state)
+            if len(pending) < len(state["analysts"]):
+                print(f"[DEBUG] initiate_all_interviews - reusing {len(state['analysts']) - len(pending)} finished interviews, running {len(pending)}")
+            # With nothing left to interview, the pool node passes straight through to the reduce phase
+            if self.pool_mode or not pending:
+                return "conduct_interviews"
+            return [Send("conduct_interview", self.opening(analyst, topic, state.get("refreshing") or ())) for analyst in pending]
+
+
+    def conduct_interviews(self, state: ResearchGraphState, config: RunnableConfig):
+        """
+        Pool-mode "map" step. Pending interviews run through a sliding window of at most
+        INTERVIEW_MAX_IN_FLIGHT at a time; each finished interview is folded in and streamed
+        out as a "section" event, and its working state is released. With a quorum or
+        straggler timeout, waiting stops at that cutoff instead of at the slowest analyst:
+        sections that land within the grace window are folded in, remaining stragglers are
+        abandoned. Also the pass-through when every analyst's interview is already cached.
+        """
+        control = get_run_control(config)
+        analysts = self.pending_analysts(state)
+        emit = get_stream_writer()
+        # Fresh config: the interviews are plain invocations sharing this run's controls, not checkpointed subgraphs
+        child_config = {"configurable": {"thread_id": config["configurable"]["thread_id"]},
+                        "recursion_limit": config.get("recursion_limit", 25)}
+        window = min(self.max_in_flight or len(analysts), len(analysts)) or 1
+        pool = ThreadPoolExecutor(max_workers=window, thread_name_prefix="interview")
+        queued, in_flight = deque(analysts), {}
+
+        def refill():
+            while queued and len(in_flight) < window:
+                analyst = queued.popleft()
+                in_flight[self.interview_future(self.opening(analyst, state["topic"], state.get("refreshing") or ()), child_config, pool)] = analyst
+
+        sections, sources, interviews = [], {}, {}
+        quorum = max(1, math.ceil(self.interview_quorum * len(analysts)))
+        started, quorum_at, finished = time.monotonic(), None, 0
+        refill()
+        while in_flight:
+            done, _ = wait(in_flight, timeout=0.25, return_when=FIRST_COMPLETED)
+            for future in done:
+                analyst = in_flight.pop(future)
+                finished += 1
+                try:
+                    result = future.result()
+                    sections += result.get("sections", [])
+                    sources.update(result.get("sources", {}))
+                    interviews.update(result.get("interviews", {}))
+                    emit({"section": {"analyst": analyst.role, "done": finished, "total": len(analysts),
+                                      "sections": result.get("sections", [])}})
+                except Exception as e:
+                    print(f"[ERROR] interview for {analyst.role} failed: {e}")
+            if not (self.quorum_mode and (queued or in_flight)):
+                refill()
+                continue
+            now = time.monotonic()
+            if quorum_at is None and finished >= quorum:
+                quorum_at = now
+            if quorum_at is not None and now - quorum_at >= self.straggler_grace:
+                break
+            if self.straggler_timeout and now - started >= self.straggler_timeout:
+                break
+            refill()
+
+        for analyst in list(in_flight.values()) + list(queued):
+            print(f"[WARNING] abandoning straggler interview: {analyst.role}")
+            control.abandon(analyst.role)
+        pool.shutdown(wait=False)
+        print(f"[DEBUG] conduct_interviews - {len(sections)} sections from {finished}/{len(analysts)} analysts in {time.monotonic() - started:.1f}s")
+        return {"sections": sections, "sources": sources, "interviews": interviews}
+
+
+    def interview_future(self, interview: dict, config: RunnableConfig, pool: ThreadPoolExecutor):
+        """
+        Future for one interview's {"sections", "sources", "interviews"}: the speculative interview already
+        running for this analyst if there is one, else a queued task, else a run on `pool`
+        """
+        control = get_run_control(config)
+        speculative = self.speculation.take(control.thread_id, interview["analyst"]) if self.speculation is not None else None
+        if speculative is not None:
+            print(f"[DEBUG] speculation - adopting interview for {interview['analyst'].role}")
+            return speculative.adopt(control)
+        if self.interview_executor is not None:
+            return self.interview_executor.submit(interview, config, self.interview_queue_timeout)
+        return pool.submit(lambda: interview_outputs(self.interview_graph.invoke(interview, config)))
+
+
+    def run_interview(self, state, config: RunnableConfig):
+        """
+        "conduct_interview" branch outside the subgraph: adopted from speculation or run on an
+        interview worker. The result goes through the normal reducers; a stopped run gets no
+        sections from this analyst, like an interrupted interview node
+        """
+        control = get_run_control(config)
+        child_config = {"configurable": {"thread_id": control.thread_id}, "recursion_limit": config.get("recursion_limit", 25)}
+        speculative = self.speculation.take(control.thread_id, state["analyst"]) if self.speculation is not None else None
+        if speculative is not None:
+            print(f"[DEBUG] speculation - adopting interview for {state['analyst'].role}")
+            future = speculative.adopt(control)
+        elif self.interview_executor is not None:
+            future = self.interview_executor.submit(state, child_config, self.interview_queue_timeout)
+        else:
+            return interview_outputs(self.interview_graph.invoke(state, child_config))
+        try:
+            return interview_outputs(control.wait([future], hard=True)[0])
+        except RunCancelled as e:
+            print(f"[WARNING] conduct_interview stopped: {e}")
+        except RemoteInterviewError as e:
+            if not control.cancelled:
+                raise
+            print(f"[WARNING] conduct_interview stopped: {e}")
+        return {"sections": []}
 
 
-    def write_report(self, state: ResearchGraphState):
+    def write_report(self, state: ResearchGraphState, config: RunnableConfig):
 
-        sections = state["sections"]
+        sections = self.run_sections(state)
         topic = state["topic"]
 
+        control = get_run_control(config)
+        if control.stopped() or control.ledger.exhausted():
+            return {"content": self.write_report_expedited(state, config)}
+
         formatted_str_sections = "\n\n".join([f"{section}" for section in sections])
         system_message = self.report_writer_instructions.format(topic=topic, context=formatted_str_sections, template=self.templatePrompt)
         full_messages = [SystemMessage(content=system_message)] + [HumanMessage(content=f"Write a report based upon these memos.")]
         sanitized = sanitize_messages(full_messages)
-        report = self.llm.invoke(sanitized)
+        try:
+            report = self.models.invoke("write_report", sanitized, config)
+        except RunCancelled as e:
+            print(f"[WARNING] write_report stopped: {e}")
+            return {"content": self.write_report_expedited(state, config)}
         return {"content": report.content}
+
+
+    def write_report_expedited(self, state: ResearchGraphState, config: RunnableConfig):
+        """ Deadline path: one fast-model pass over whatever sections exist, else the sections verbatim """
+        sections = self.run_sections(state)
+        if not sections:
+            return "## Insights\n\nNo analyst sections were completed before the run was stopped."
+
+        formatted_str_sections = "\n\n".join([f"{section}" for section in sections])
+        system_message = self.report_writer_instructions.format(topic=state["topic"], context=formatted_str_sections, template=self.templatePrompt)
+        full_messages = [SystemMessage(content=system_message)] + [HumanMessage(content=f"Write a concise report based upon these memos.")]
+        try:
+            report = self.models.invoke("write_report_expedited", sanitize_messages(full_messages), config)
+            return report.content
+        except RunCancelled as e:
+            print(f"[WARNING] expedited report stopped: {e}")
+            return "## Insights\n\n" + formatted_str_sections
     
 
-    def write_introduction(self, state: ResearchGraphState):
+    def write_introduction(self, state: ResearchGraphState, config: RunnableConfig):
 
-        sections = state["sections"]
+        sections = self.run_sections(state)
         topic = state["topic"]
 
+        expedited = {"introduction": f"# {topic}\n\n## Introduction\n\nThis report was compiled from {len(sections)} of {len(state.get('analysts', []))} analyst memos before the run was stopped."}
+        control = get_run_control(config)
+        if control.stopped() or control.ledger.exhausted():
+            return expedited
+
         formatted_str_sections = "\n\n".join([f"{section}" for section in sections])
 
         instructions = intro_conclusion_instructions.format(topic=topic, formatted_str_sections=formatted_str_sections)
         full_messages = [SystemMessage(content=instructions)] + [HumanMessage(content=f"Write the report introduction")]
         sanitized = sanitize_messages(full_messages)
-        intro = self.llm.invoke(sanitized)
+        try:
+            intro = self.models.invoke("write_introduction", sanitized, config)
+        except RunCancelled:
+            return expedited
         return {"introduction": intro.content}
 
 
-    def write_conclusion(self, state: ResearchGraphState):
+    def write_conclusion(self, state: ResearchGraphState, config: RunnableConfig):
 
-        sections = state["sections"]
+        sections = self.run_sections(state)
         topic = state["topic"]
 
+        expedited = {"conclusion": "## Conclusion\n\nFindings above are partial: the run was stopped before every analyst finished."}
+        control = get_run_control(config)
+        if control.stopped() or control.ledger.exhausted():
+            return expedited
+
         formatted_str_sections = "\n\n".join([f"{section}" for section in sections])
 
         instructions = intro_conclusion_instructions.format(topic=topic, formatted_str_sections=formatted_str_sections)
         full_messages = [SystemMessage(content=instructions)] + [HumanMessage(content=f"Write the report conclusion")]
         sanitized = sanitize_messages(full_messages)
-        conclusion = self.llm.invoke(sanitized)
+        try:
+            conclusion = self.models.invoke("write_conclusion", sanitized, config)
+        except RunCancelled:
+            return expedited
         return {"conclusion": conclusion.content}
 
 
-    def finalize_report(self, state: ResearchGraphState):
+    def finalize_report(self, state: ResearchGraphState, config: RunnableConfig):
         """ The is the "reduce" step where we gather all the sections, combine them, and reflect on them to write the intro/conclusion """
 
-        content = state["content"]
-        if content.startswith("## Insights"):
-            content = content
-            
-        if "## Sources" in content:
-            try:
-                content, sources = content.split("\n## Sources\n")
-            except:
-                sources = None
-        else:
-            sources = None
-
-        final_report = state["introduction"] + "\n\n---\n\n" + content + "\n\n---\n\n" + state["conclusion"]
-        if sources is not None:
-            final_report += "\n\n## Sources\n" + sources
-        return {"final_report": final_report}
+        # Sources come from the run-wide registry, never from whatever listing the model wrote
+        parts = [strip_source_listings(state[key]) for key in ("introduction", "content", "conclusion")]
+        final_report = "\n\n---\n\n".join(parts)
+        final_report, sources = render_citations(final_report, state.get("sources", {}))
+        if sources:
+            final_report += "\n\n## Sources\n\n" + sources
+        control = get_run_control(config)
+        token_usage = control.ledger.snapshot()
+        retrieval = control.evidence.stats()
+        if retrieval:
+            token_usage["retrieval"] = retrieval
+            print(f"[DEBUG] finalize_report - retrieval: {retrieval}")
+        if self.speculation is not None:
+            self.speculation.discard(config["configurable"]["thread_id"])
+        release_run(config["configurable"]["thread_id"])
+        return {"final_report": final_report, "token_usage": token_usage, "refreshing": []}
     
 
-    def build(self):
+    def build(self, checkpointer=None):
+        """ Compile the research graph; defaults to an in-memory checkpointer scoped to this graph """
         builder = StateGraph(ResearchGraphState)
         
         # Define a standard retry policy for transient API errors
         retry_policy = RetryPolicy(max_attempts=3, backoff_factor=2.0)
         
-        builder.add_node("create_analysts", self.interview_builder.create_analysts, retry=retry_policy)
+        builder.add_node("create_analysts", profiled("create_analysts", self.create_analysts), retry=retry_policy)
         builder.add_node("human_feedback",  self.interview_builder.human_feedback)
-        builder.add_node("conduct_interview", self.interview_builder.build().compile(), retry=retry_policy)
-        builder.add_node("write_report",self.write_report, retry=retry_policy)
-        builder.add_node("write_introduction",self.write_introduction, retry=retry_policy)
-        builder.add_node("write_conclusion",self.write_conclusion, retry=retry_policy)
-        builder.add_node("finalize_report",self.finalize_report, retry=retry_policy)
+        # Pool mode (quorum, sliding window) and queue workers run the interviews themselves, so they must not be retried or checkpointed as a unit
+        self.interview_graph = self.interview_builder.build().compile(checkpointer=False)
+        if self.interview_executor is not None or self.speculation is not None:
+            builder.add_node("conduct_interview", profiled("conduct_interview", self.run_interview), retry=retry_policy)
+            if self.local_interview_workers and self._workers_stop is None:
+                self._workers_stop = start_workers(self.interview_executor.queue, self.interview_graph, self.local_interview_workers)
+        else:
+            builder.add_node("conduct_interview", self.interview_builder.build().compile(), retry=retry_policy)
+        builder.add_node("conduct_interviews", profiled("conduct_interviews", self.conduct_interviews))
+        builder.add_node("write_report", profiled("write_report", self.write_report), retry=retry_policy)
+        builder.add_node("write_introduction", profiled("write_introduction", self.write_introduction), retry=retry_policy)
+        builder.add_node("write_conclusion", profiled("write_conclusion", self.write_conclusion), retry=retry_policy)
+        builder.add_node("finalize_report", profiled("finalize_report", self.finalize_report), retry=retry_policy)
 
         builder.add_edge(START, "create_analysts")
         builder.add_edge("create_analysts", "human_feedback")
-        builder.add_conditional_edges("human_feedback", self.initiate_all_interviews, ["create_analysts", "conduct_interview"])
-        builder.add_edge("conduct_interview", "write_report")
-        builder.add_edge("conduct_interview", "write_introduction")
-        builder.add_edge("conduct_interview", "write_conclusion")
+        builder.add_conditional_edges("human_feedback", self.initiate_all_interviews, ["create_analysts", "conduct_interview", "conduct_interviews"])
+        for interviews in ("conduct_interview", "conduct_interviews"):
+            builder.add_edge(interviews, "write_report")
+            builder.add_edge(interviews, "write_introduction")
+            builder.add_edge(interviews, "write_conclusion")
         builder.add_edge(["write_conclusion", "write_report", "write_introduction"], "finalize_report")
         builder.add_edge("finalize_report", END)
 
-        memory = MemorySaver()
+        memory = checkpointer if checkpointer is not None else MemorySaver()
         graph = builder.compile(interrupt_before=['human_feedback'], checkpointer=memory)
         return graph
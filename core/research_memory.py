@@ -0,0 +1,223 @@
+"""
+Cross-run research memory: analyst personas, retrieved passages and written sections
+from earlier runs, kept in a SQLite file with an FTS5 inverted index over their terms.
+
+    RESEARCH_MEMORY=service_data/research_memory.sqlite
+
+With memory enabled, `create_analysts` reuses the personas of a past run on an
+overlapping topic, search nodes answer from stored passages when enough of them
+cover a query, and an interview whose analyst already wrote a fresh section on an
+overlapping topic reuses it instead of being run again. Entries older than MEMORY_MAX_AGE_DAYS are ignored and pruned.
+
+    python -m core.research_memory stats [path]
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from .cassette import _decode, _encode
+from .sources import CITATION_RE
+from .text_scoring import result_text, tokenize
+
+PERSONA = "persona"
+PASSAGE = "passage"
+SECTION = "section"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory_items (
+    item_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    run_id TEXT,
+    created_at REAL NOT NULL,
+    used_at REAL,
+    uses INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS memory_items_by_scope ON memory_items (kind, scope, created_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS memory_terms USING fts5(item_id UNINDEXED, kind UNINDEXED, terms);
+"""
+
+
+def _terms(text: str) -> str:
+    """ Index terms in the same normalized form as the BM25 scorers (stopwords dropped, plurals folded) """
+    return " ".join(tokenize(text))
+
+
+def fingerprint(*parts: str) -> str:
+    return hashlib.sha1("\x1f".join(p.strip().lower() for p in parts).encode("utf-8")).hexdigest()[:16]
+
+
+def topic_overlap(a: str, b: str) -> float:
+    """ Jaccard overlap of two topics' terms """
+    ta, tb = set(tokenize(a)), set(tokenize(b))
+    return len(ta & tb) / len(ta | tb) if ta and tb else 0.0
+
+
+class ResearchMemory:
+    """ Each call opens its own short-lived connection, so one instance is safe across threads and processes """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.max_age = float(os.environ.get("MEMORY_MAX_AGE_DAYS", 30)) * 86400
+        self.topic_match = float(os.environ.get("MEMORY_TOPIC_MATCH", 0.6))
+        self.min_passages = int(os.environ.get("MEMORY_MIN_PASSAGES", 3))
+        self.passage_coverage = float(os.environ.get("MEMORY_PASSAGE_COVERAGE", 0.6))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        self.prune()
+
+    @classmethod
+    def from_env(cls) -> Optional["ResearchMemory"]:
+        path = os.environ.get("RESEARCH_MEMORY", "").strip()
+        return cls(path) if path else None
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _fresh_after(self) -> float:
+        return time.time() - self.max_age
+
+    def _put(self, conn, item_id: str, kind: str, scope: str, topic: str, payload, run_id: str, terms: str):
+        # Re-storing an item refreshes it: the newest retrieval of a passage is the one that counts
+        exists = conn.execute("SELECT 1 FROM memory_items WHERE item_id = ?", (item_id,)).fetchone()
+        conn.execute("INSERT OR REPLACE INTO memory_items (item_id, kind, scope, topic, payload, run_id, created_at) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?)", (item_id, kind, scope, topic, json.dumps(_encode(payload)), run_id, time.time()))
+        if not exists:
+            conn.execute("INSERT INTO memory_terms (item_id, kind, terms) VALUES (?, ?, ?)", (item_id, kind, terms))
+
+    def _touch(self, conn, item_ids):
+        conn.executemany("UPDATE memory_items SET used_at = ?, uses = uses + 1 WHERE item_id = ?",
+                         [(time.time(), item_id) for item_id in item_ids])
+
+    def prune(self):
+        """ Drop entries past MEMORY_MAX_AGE_DAYS """
+        with self._connect() as conn:
+            stale = [row[0] for row in conn.execute("SELECT item_id FROM memory_items WHERE created_at < ?", (self._fresh_after(),))]
+            conn.executemany("DELETE FROM memory_terms WHERE item_id = ?", [(i,) for i in stale])
+            conn.executemany("DELETE FROM memory_items WHERE item_id = ?", [(i,) for i in stale])
+
+    # --- personas ---
+
+    def remember_analysts(self, topic: str, analysts: List, run_id: str):
+        with self._connect() as conn:
+            for i, analyst in enumerate(analysts):
+                persona = analyst.model_dump()
+                self._put(conn, fingerprint(PERSONA, run_id, str(i)), PERSONA, run_id, topic, {"order": i, **persona},
+                          run_id, _terms(f"{topic} {analyst.role} {analyst.description}"))
+
+    def recall_analysts(self, topic: str, max_analysts: int) -> Optional[List[dict]]:
+        """ Personas of the past run whose topic overlaps `topic` most, if it had enough of them """
+        query = " OR ".join(f'"{t}"' for t in set(tokenize(topic)))
+        if not query:
+            return None
+        with self._connect() as conn:
+            runs = {row["scope"]: row["topic"] for row in conn.execute(
+                "SELECT DISTINCT i.scope, i.topic FROM memory_terms t JOIN memory_items i ON i.item_id = t.item_id "
+                "WHERE memory_terms MATCH ? AND t.kind = ? AND i.created_at >= ?", (f"terms: ({query})", PERSONA, self._fresh_after()))}
+            ranked = sorted(((topic_overlap(topic, past), run) for run, past in runs.items()), reverse=True)
+            for overlap, run in ranked:
+                if overlap < self.topic_match:
+                    break
+                rows = conn.execute("SELECT item_id, payload FROM memory_items WHERE kind = ? AND scope = ?", (PERSONA, run)).fetchall()
+                if len(rows) >= max_analysts:
+                    personas = sorted((json.loads(row["payload"]) for row in rows), key=lambda p: p.pop("order"))[:max_analysts]
+                    self._touch(conn, [row["item_id"] for row in rows])
+                    print(f"[DEBUG] research memory - reusing {len(personas)} analysts from run {run} (topic overlap {overlap:.2f})")
+                    return personas
+        return None
+
+    # --- passages ---
+
+    def remember_results(self, node: str, query: str, results: list, run_id: str):
+        if not isinstance(results, list):
+            return
+        with self._connect() as conn:
+            for result in results:
+                text = result_text(result)
+                self._put(conn, fingerprint(PASSAGE, node, text), PASSAGE, node, query, result, run_id, _terms(text))
+
+    def recall_results(self, node: str, query: str) -> Optional[list]:
+        """
+        Stored `node` results for `query`, in the backend's own format, when at least
+        `min_passages` fresh passages each cover `passage_coverage` of the query terms
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return None
+        match = " OR ".join(f'"{t}"' for t in terms)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT i.item_id, i.payload, t.terms FROM memory_terms t JOIN memory_items i ON i.item_id = t.item_id "
+                "WHERE memory_terms MATCH ? AND t.kind = ? AND i.scope = ? AND i.created_at >= ? ORDER BY bm25(memory_terms) LIMIT 20",
+                (f"terms: ({match})", PASSAGE, node, self._fresh_after())).fetchall()
+            covered = [row for row in rows if len(terms & set(row["terms"].split())) >= self.passage_coverage * len(terms)]
+            if len(covered) < self.min_passages:
+                return None
+            covered = covered[:max(self.min_passages, 3)]
+            self._touch(conn, [row["item_id"] for row in covered])
+        return [_decode(json.loads(row["payload"])) for row in covered]
+
+    def wrap(self, node: str, run_id: str, fn, recall: bool = True):
+        """ `fn(query)` answered from memory when it can be (and `recall` is on), otherwise called and remembered """
+        def search(query):
+            recalled = self.recall_results(node, query) if recall else None
+            if recalled is not None:
+                print(f"[DEBUG] research memory - {node} served '{query}' from {len(recalled)} stored passages")
+                return recalled
+            results = fn(query)
+            self.remember_results(node, query, results, run_id)
+            return results
+        return search
+
+    # --- sections ---
+
+    def remember_section(self, analyst, topic: str, section: str, sources: dict, run_id: str):
+        cited = {sid for group in CITATION_RE.findall(section) for sid in group.replace(";", ",").replace(" ", "").split(",")}
+        payload = {"section": section, "sources": {sid: s for sid, s in (sources or {}).items() if sid in cited}}
+        # Scoped by analyst, one entry per topic, so the same persona on another topic doesn't replace it
+        scope = fingerprint(SECTION, analyst.role, analyst.description)
+        with self._connect() as conn:
+            self._put(conn, fingerprint(SECTION, analyst.role, analyst.description, topic), SECTION, scope,
+                      topic, payload, run_id, _terms(section))
+
+    def recall_section(self, analyst, topic: str) -> Optional[dict]:
+        """ {"section", "sources"} an identical analyst wrote in a fresh past run on an overlapping topic """
+        scope = fingerprint(SECTION, analyst.role, analyst.description)
+        with self._connect() as conn:
+            rows = conn.execute("SELECT item_id, topic, payload FROM memory_items WHERE kind = ? AND scope = ? AND created_at >= ? "
+                                "ORDER BY created_at DESC", (SECTION, scope, self._fresh_after())).fetchall()
+            ranked = sorted(((topic_overlap(topic, row["topic"]), i) for i, row in enumerate(rows)), key=lambda r: (-r[0], r[1]))
+            if not ranked or ranked[0][0] < self.topic_match:
+                return None
+            row = rows[ranked[0][1]]
+            self._touch(conn, [row["item_id"]])
+        return json.loads(row["payload"])
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            return {row["kind"]: {"items": row["items"], "uses": row["uses"], "oldest_days": round((time.time() - row["oldest"]) / 86400, 1)}
+                    for row in conn.execute("SELECT kind, COUNT(*) AS items, SUM(uses) AS uses, MIN(created_at) AS oldest "
+                                            "FROM memory_items GROUP BY kind")}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3) or sys.argv[1] != "stats":
+        sys.exit("usage: python -m core.research_memory stats [path]")
+    path = sys.argv[2] if len(sys.argv) == 3 else os.environ.get("RESEARCH_MEMORY", "service_data/research_memory.sqlite")
+    print(json.dumps(ResearchMemory(path).stats(), indent=2))
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Optional
+
+from .cassette import Cassette
+from .evidence import EvidencePool
+from .profiling import follow
+from .token_budget import TokenLedger
+
+
+class RunCancelled(RuntimeError):
+    """ Raised when a run is cancelled or its deadline passes (not retried by RetryPolicy) """
+
+
+# Calls under a deadline run here so the caller can stop waiting without killing the thread
+_deadline_pool = ThreadPoolExecutor(max_workers=int(os.environ.get("DEADLINE_POOL_WORKERS", 64)),
+                                    thread_name_prefix="deadline-call")
+
+
+class RunControl:
+    """
+    Per-run wall-clock deadline and cancellation token.
+
+    The interview phase stops at `deadline`; the reduce phase may run until
+    `deadline + reduce_grace` so whatever sections exist can still be written up.
+    A control with a `parent` (an adopted speculative interview) also stops when the parent does.
+    `evidence` is the run's shared pool of retrieved results.
+    """
+
+    def __init__(self, thread_id: str):
+        self.thread_id = thread_id
+        self.deadline: Optional[float] = None
+        self.reduce_grace = float(os.environ.get("RUN_REDUCE_GRACE_SECONDS", 45))
+        self.reason = None
+        self.ledger = TokenLedger(thread_id)
+        self.cassette = Cassette.from_env(thread_id)
+        self.evidence = EvidencePool()
+        self._cancelled = threading.Event()
+        self._abandoned = set()
+        self.parent: Optional["RunControl"] = None
+
+    def arm(self, seconds: Optional[float]):
+        """ Start the deadline clock; the first call wins """
+        if seconds and self.deadline is None:
+            self.deadline = time.monotonic() + seconds
+
+    def cancel(self, reason: str = "cancelled"):
+        self.reason = reason
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    def abandon(self, analyst: str):
+        """ Stop one straggling interview; the rest of the run carries on """
+        self._abandoned.add(analyst)
+
+    def reinstate(self, analyst: str):
+        """ Undo `abandon`, e.g. once a withdrawn queue task has drained so a retry can run """
+        self._abandoned.discard(analyst)
+
+    def abandoned(self, analyst: str) -> bool:
+        return analyst in self._abandoned or (self.parent is not None and self.parent.abandoned(analyst))
+
+    def remaining(self, hard: bool = False) -> Optional[float]:
+        """ Seconds left, or None without a deadline. `hard` includes the reduce grace window """
+        inherited = self.parent.remaining(hard) if self.parent is not None else None
+        if self.deadline is None:
+            return inherited
+        limit = self.deadline + (self.reduce_grace if hard else 0)
+        own = limit - time.monotonic()
+        return own if inherited is None else min(own, inherited)
+
+    def stopped(self, hard: bool = False) -> bool:
+        """ True once cancelled or out of time for the given phase """
+        if self.cancelled:
+            return True
+        remaining = self.remaining(hard)
+        return remaining is not None and remaining <= 0
+
+    def check(self, hard: bool = False):
+        if self.cancelled:
+            raise RunCancelled(f"Run {self.thread_id} {self.reason or (self.parent and self.parent.reason)}")
+        if self.stopped(hard):
+            raise RunCancelled(f"Run {self.thread_id} exceeded its deadline")
+
+    def run(self, fn, *args, hard: bool = False, **kwargs):
+        """
+        Call `fn` bounded by the remaining time and the cancellation token. The call is
+        abandoned (left to finish in the background) once time runs out or the run is cancelled.
+        """
+        return self.wait([_deadline_pool.submit(follow(fn), *args, **kwargs)], hard)[0]
+
+    def map(self, fn, items, hard: bool = False):
+        """ Like `run`, for `fn(item)` over several items at once; results come back in input order """
+        fn = follow(fn)
+        return self.wait([_deadline_pool.submit(fn, item) for item in items], hard)
+
+    def wait(self, futures, hard: bool = False):
+        """
+        Results of futures that are already running elsewhere, bounded by the remaining time and
+        the cancellation token. Waits on the calling thread and takes no deadline-pool worker
+        """
+        self.check(hard)
+        return self._wait(futures, hard)
+
+    def _wait(self, futures, hard: bool):
+        while True:
+            remaining = self.remaining(hard)
+            _, pending = wait(futures, timeout=0.25 if remaining is None else max(0.0, min(remaining, 0.25)))
+            if not pending:
+                return [future.result() for future in futures]
+            if self.stopped(hard):
+                for future in pending:
+                    future.cancel()
+                self.check(hard)
+
+
+_controls = {}
+_controls_lock = threading.Lock()
+
+
+def get_run_control(config) -> RunControl:
+    """ The control for the run identified by config["configurable"]["thread_id"] """
+    thread_id = ((config or {}).get("configurable") or {}).get("thread_id", "default")
+    with _controls_lock:
+        if thread_id not in _controls:
+            _controls[thread_id] = RunControl(thread_id)
+        return _controls[thread_id]
+
+
+def peek_run_control(thread_id: str) -> Optional[RunControl]:
+    """ The control for a run in this process, without creating one """
+    with _controls_lock:
+        return _controls.get(thread_id)
+
+
+def cancel_run(thread_id: str, reason: str = "cancelled"):
+    """ Cancel a run from outside the graph; in-flight calls are abandoned and the report is expedited """
+    get_run_control({"configurable": {"thread_id": thread_id}}).cancel(reason)
+
+
+def release_run(thread_id: str):
+    with _controls_lock:
+        _controls.pop(thread_id, None)
@@ -0,0 +1,143 @@
+import codecs
+import os
+from html.parser import HTMLParser
+from typing import List, Optional
+from urllib.parse import quote
+
+from langchain_core.documents import Document
+
+from .http_pool import get_http_client
+from .text_scoring import bm25_scores, split_passages
+
+
+class _SectionStreamParser(HTMLParser):
+    """ Incremental parser over Parsoid article HTML that emits (heading, text) per section """
+
+    SKIP_TAGS = {"script", "style", "table", "sup", "figure", "math", "noscript"}
+    HEADING_TAGS = {"h2", "h3", "h4"}
+    BLOCK_TAGS = {"p", "li", "dd", "dt", "blockquote"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.heading = "Introduction"
+        self._ready = []
+        self._parts = []
+        self._heading_parts = None
+        self._skip = 0
+
+    def _flush(self):
+        text = "".join(self._parts).strip()
+        if text:
+            self._ready.append((self.heading, text))
+        self._parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip += 1
+        elif self._skip:
+            return
+        elif tag in self.HEADING_TAGS:
+            self._flush()
+            self._heading_parts = []
+        elif tag in self.BLOCK_TAGS:
+            self._parts.append("\n\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in self.HEADING_TAGS and self._heading_parts is not None:
+            self.heading = "".join(self._heading_parts).strip() or self.heading
+            self._heading_parts = None
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        if self._heading_parts is not None:
+            self._heading_parts.append(data)
+        else:
+            self._parts.append(data)
+
+    def drain(self):
+        ready, self._ready = self._ready, []
+        return ready
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+class WikipediaClient:
+    """
+    MediaWiki client over the shared pooled connection.
+
+    Articles are streamed section by section with a byte cap per page, split into
+    passages, and only the passages scoring highest against the query are returned
+    (one Document per passage, with the section heading as "page").
+    """
+
+    USER_AGENT = "DeepResearch/1.0 (LangGraph research engine)"
+
+    def __init__(self, lang: str = "en", max_bytes: Optional[int] = None, max_passages: Optional[int] = None,
+                 passage_chars: Optional[int] = None):
+        self.lang = lang
+        self.api_url = f"https://{lang}.wikipedia.org/w/api.php"
+        self.max_bytes = max_bytes or int(os.environ.get("WIKIPEDIA_MAX_BYTES", 150000))
+        self.max_passages = max_passages or int(os.environ.get("WIKIPEDIA_PASSAGES", 4))
+        self.passage_chars = passage_chars or int(os.environ.get("WIKIPEDIA_PASSAGE_CHARS", 600))
+
+    def _get(self, params):
+        response = get_http_client().get(
+            self.api_url,
+            params={"format": "json", "formatversion": 2, **params},
+            headers={"User-Agent": self.USER_AGENT},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def search(self, query: str, limit: int) -> List[str]:
+        data = self._get({"action": "query", "list": "search", "srsearch": query[:300], "srlimit": limit})
+        return [hit["title"] for hit in data.get("query", {}).get("search", [])]
+
+    def page_url(self, title: str) -> str:
+        return f"https://{self.lang}.wikipedia.org/wiki/{quote(title.replace(' ', '_'))}"
+
+    def iter_sections(self, title: str):
+        """ Yield (heading, text) as each section arrives; stops reading after `max_bytes` """
+        url = f"https://{self.lang}.wikipedia.org/api/rest_v1/page/html/{quote(title.replace(' ', '_'), safe='')}"
+        parser = _SectionStreamParser()
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        received = 0
+        with get_http_client().stream("GET", url, headers={"User-Agent": self.USER_AGENT}) as response:
+            response.raise_for_status()
+            for chunk in response.iter_bytes():
+                received += len(chunk)
+                parser.feed(decoder.decode(chunk))
+                yield from parser.drain()
+                if received >= self.max_bytes:
+                    print(f"[DEBUG] wikipedia - '{title}' capped at {received} bytes")
+                    break
+        parser.close()
+        yield from parser.drain()
+
+    def load(self, query: str, load_max_docs: int = 2) -> List[Document]:
+        titles = self.search(query, load_max_docs)
+
+        candidates = []
+        for title in titles:
+            for heading, text in self.iter_sections(title):
+                for passage in split_passages(text, self.passage_chars):
+                    candidates.append((title, heading, passage))
+        if not candidates:
+            return []
+
+        scores = bm25_scores(query, [f"{title} {heading} {passage}" for title, heading, passage in candidates])
+        ranked = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)[: self.max_passages]
+
+        docs = []
+        for i in ranked:
+            title, heading, passage = candidates[i]
+            docs.append(Document(
+                page_content=passage,
+                metadata={"title": title, "source": self.page_url(title), "page": heading, "score": scores[i]},
+            ))
+        return docs
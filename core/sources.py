@@ -0,0 +1,67 @@
+import hashlib
+import re
+
+# Short, content-addressed IDs: parallel interviews assign the same ID to the same
+# source without coordinating, and the per-branch registries merge with a plain dict update
+CITATION_RE = re.compile(r"\[(S[0-9a-f]{6}(?:\s*[,;]\s*S[0-9a-f]{6})*)\]")
+SOURCE_LISTING_RE = re.compile(r"^#{2,3}\s*\**\s*(?:Verified\s+)?(?:Sources|References)\b.*?(?=^#{1,2}\s|\Z)",
+                               re.IGNORECASE | re.MULTILINE | re.DOTALL)
+
+
+def merge_sources(left: dict, right: dict) -> dict:
+    """ Graph-state reducer for the run-wide source registry """
+    return {**(left or {}), **(right or {})}
+
+
+def source_id(url: str, page: str = "") -> str:
+    key = f"{url.strip()}#{page.strip()}" if page else url.strip()
+    return "S" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:6]
+
+
+def register_source(registry: dict, url: str, title: str = "", page: str = "") -> str:
+    """ Add a source to `registry` (once) and return its citation ID """
+    sid = source_id(url, page)
+    if sid not in registry:
+        registry[sid] = {"url": url, "title": title or "", "page": page or ""}
+    return sid
+
+
+def format_document(sid: str, content: str, title: str = "") -> str:
+    """ Retrieval context block; prompts see the ID and title, never the full URL """
+    title_attr = f' title="{title}"' if title else ""
+    return f'<Document id="{sid}"{title_attr}/>\n{content}\n</Document>'
+
+
+def strip_source_listings(text: str) -> str:
+    """ Drop any Sources/References sections a model wrote; the registry renders the real one """
+    return SOURCE_LISTING_RE.sub("", text).rstrip()
+
+
+def render_citations(text: str, registry: dict):
+    """
+    Renumber source IDs to [1], [2], ... in order of first citation and render the
+    matching Sources list. IDs missing from the registry are dropped from the text.
+    Returns (text, sources_markdown).
+    """
+    numbers = {}
+
+    def renumber(match):
+        cited = []
+        for sid in re.split(r"\s*[,;]\s*", match.group(1)):
+            if sid not in registry:
+                continue
+            if sid not in numbers:
+                numbers[sid] = len(numbers) + 1
+            cited.append(numbers[sid])
+        return "".join(f"[{n}]" for n in dict.fromkeys(cited))
+
+    text = CITATION_RE.sub(renumber, text)
+    lines = []
+    for sid, n in numbers.items():
+        source = registry[sid]
+        label = source["title"] or source["url"]
+        if source["page"] and source["page"] != source["title"]:
+            label += f", {source['page']}"
+        link = f" – {source['url']}" if source["url"] != label else ""
+        lines.append(f"[{n}] {label}{link}")
+    return text, "\n\n".join(lines)
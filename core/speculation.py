@@ -0,0 +1,118 @@
+"""
+Speculative interviews: with SPECULATIVE_INTERVIEWS=1, each proposed analyst's interview
+starts in the background as soon as `create_analysts` returns, while a person is still
+reviewing the analysts. Approving as-is adopts the running interviews. Feedback that
+regenerates the analysts discards only the interviews of personas that changed.
+
+A speculative interview runs under its own run id until it is adopted, sharing the real
+run's evidence pool from the start. After that its RunControl defers to the real run's,
+so the deadline, cancellation and straggler abandonment apply to it, and its token
+usage is merged into the run's ledger when it finishes.
+Speculation lives in the process that created the analysts; a run resumed elsewhere
+just interviews normally. Nothing is started for a cancelled run or once the speculation
+pool has shut down, and an interview that failed or was cancelled is not adopted.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from .run_control import cancel_run, get_run_control, release_run
+
+_speculation_pool = ThreadPoolExecutor(max_workers=int(os.environ.get("SPECULATION_POOL_WORKERS", 16)),
+                                       thread_name_prefix="speculative-interview")
+
+
+class SpeculativeInterview:
+    def __init__(self, run_id: str, analyst, future):
+        self.run_id = run_id
+        self.analyst = analyst
+        self.future = future
+
+    @property
+    def usable(self) -> bool:
+        """ False once the interview was cancelled or failed; the analyst is then interviewed normally """
+        if self.future.cancelled():
+            return False
+        return not self.future.done() or self.future.exception() is None
+
+    def adopt(self, control):
+        """ Hand the interview over to the real run's `control` """
+        get_run_control({"configurable": {"thread_id": self.run_id}}).parent = control
+
+        def merge_usage(_):
+            spec_control = get_run_control({"configurable": {"thread_id": self.run_id}})
+            for bucket, usage in spec_control.ledger.snapshot()["buckets"].items():
+                control.ledger.merge(bucket, usage)
+            release_run(self.run_id)
+
+        self.future.add_done_callback(merge_usage)
+        return self.future
+
+    def discard(self, reason: str):
+        cancel_run(self.run_id, reason)
+        self.future.add_done_callback(lambda _: release_run(self.run_id))
+
+
+class SpeculationRegistry:
+    """ Speculative interviews in flight, per run and analyst fingerprint """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs = {}
+
+    def start(self, thread_id: str, analysts, interview_fn, recursion_limit: int = 25):
+        """
+        Speculate on `analysts` for run `thread_id`: keep interviews whose persona is unchanged,
+        discard the rest and start `interview_fn(analyst, config)` for new personas
+        """
+        wanted = {a.fingerprint: a for a in analysts}
+        control = get_run_control({"configurable": {"thread_id": thread_id}})
+        if control.cancelled:
+            print(f"[WARNING] speculation - run {thread_id} is cancelled, not speculating")
+            return
+        with self._lock:
+            running = self._runs.setdefault(thread_id, {})
+            for fp in [fp for fp in running if fp not in wanted]:
+                print(f"[DEBUG] speculation - discarding interview for changed analyst {running[fp].analyst.role}")
+                running.pop(fp).discard("analyst changed")
+            for fp, analyst in wanted.items():
+                if fp in running:
+                    continue
+                run_id = f"{thread_id}~spec~{fp}"
+                config = {"configurable": {"thread_id": run_id}, "recursion_limit": recursion_limit}
+                get_run_control(config).evidence = control.evidence
+                try:
+                    future = _speculation_pool.submit(interview_fn, analyst, config)
+                except RuntimeError as e:
+                    # The pool is shut down (interpreter exit); the analysts are interviewed normally after approval
+                    print(f"[WARNING] speculation - not starting interviews: {e}")
+                    release_run(run_id)
+                    break
+                running[fp] = SpeculativeInterview(run_id, analyst, future)
+            print(f"[DEBUG] speculation - {len(running)} interviews running for run {thread_id}")
+
+    def take(self, thread_id: str, analyst) -> Optional[SpeculativeInterview]:
+        """ The speculative interview to adopt for `analyst`, or None to interview normally """
+        with self._lock:
+            speculative = self._runs.get(thread_id, {}).pop(analyst.fingerprint, None)
+        if speculative is not None and not speculative.usable:
+            print(f"[WARNING] speculation - not adopting the stopped interview for {analyst.role}")
+            speculative.discard("not usable")
+            return None
+        return speculative
+
+    def discard(self, thread_id: str, reason: str = "not used"):
+        """ Drop whatever speculation is left for a run, e.g. once its report is written """
+        with self._lock:
+            running = self._runs.pop(thread_id, {})
+        for speculative in running.values():
+            speculative.discard(reason)
+
+
+_registry = SpeculationRegistry()
+
+
+def get_speculation() -> Optional[SpeculationRegistry]:
+    """ The process-wide registry, or None unless SPECULATIVE_INTERVIEWS=1 """
+    return _registry if os.environ.get("SPECULATIVE_INTERVIEWS", "0") == "1" else None
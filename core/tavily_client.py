@@ -0,0 +1,44 @@
+"""
+Tavily web search over the shared HTTP pool. Kept apart from search_clients because
+langchain_community is slow to import; interview builders load it on first search.
+"""
+from typing import Dict, List, Optional
+
+from langchain_community.tools.tavily_search import TavilySearchResults
+from langchain_community.utilities.tavily_search import TAVILY_API_URL, TavilySearchAPIWrapper
+
+from .http_pool import get_http_client
+
+
+class PooledTavilySearchAPIWrapper(TavilySearchAPIWrapper):
+    """ Tavily wrapper that posts through the shared pooled client instead of a fresh requests session """
+
+    def raw_results(
+        self,
+        query: str,
+        max_results: Optional[int] = 5,
+        search_depth: Optional[str] = "advanced",
+        include_domains: Optional[List[str]] = [],
+        exclude_domains: Optional[List[str]] = [],
+        include_answer: Optional[bool] = False,
+        include_raw_content: Optional[bool] = False,
+        include_images: Optional[bool] = False,
+    ) -> Dict:
+        params = {
+            "api_key": self.tavily_api_key.get_secret_value(),
+            "query": query,
+            "max_results": max_results,
+            "search_depth": search_depth,
+            "include_domains": include_domains,
+            "exclude_domains": exclude_domains,
+            "include_answer": include_answer,
+            "include_raw_content": include_raw_content,
+            "include_images": include_images,
+        }
+        response = get_http_client().post(f"{TAVILY_API_URL}/search", json=params)
+        response.raise_for_status()
+        return response.json()
+
+
+def build_tavily_search(max_results: int = 3) -> TavilySearchResults:
+    return TavilySearchResults(max_results=max_results, api_wrapper=PooledTavilySearchAPIWrapper())
@@ -0,0 +1,105 @@
+import math
+import re
+from collections import Counter
+from typing import Callable, List, Optional, Sequence
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were what which who will with".split()
+)
+
+
+def _normalize(token: str) -> str:
+    """ Light plural folding so "agents" and "agent" share a term """
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [_normalize(t) for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def result_text(result) -> str:
+    """ Title plus body of one search result (web/local dict or Wikipedia Document), for indexing """
+    if isinstance(result, dict):
+        return f"{result.get('title', '')}\n{result.get('content', '')}"
+    if hasattr(result, "page_content"):
+        return f"{result.metadata.get('title', '')}\n{result.page_content}"
+    return str(result)
+
+
+def split_passages(text: str, max_chars: int = 800) -> List[str]:
+    """ Greedy paragraph packing into passages of roughly `max_chars` """
+    passages, current = [], ""
+    for para in re.split(r"\n\s*\n", text):
+        para = " ".join(para.split())
+        if not para:
+            continue
+        while len(para) > max_chars:
+            cut = para.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                passages.append(current)
+                current = ""
+            passages.append(para[:cut])
+            para = para[cut:].strip()
+        if current and len(current) + len(para) + 1 > max_chars:
+            passages.append(current)
+            current = para
+        else:
+            current = f"{current} {para}".strip()
+    if current:
+        passages.append(current)
+    return passages
+
+
+def bm25_scores(query: str, passages: Sequence[str], k1: float = 1.2, b: float = 0.75) -> List[float]:
+    """ BM25 score of every passage against `query`, with statistics taken from the passages themselves """
+    docs = [Counter(tokenize(p)) for p in passages]
+    if not docs:
+        return []
+    lengths = [sum(d.values()) for d in docs]
+    avgdl = (sum(lengths) / len(lengths)) or 1.0
+    n = len(docs)
+
+    scores = [0.0] * n
+    for term in set(tokenize(query)):
+        df = sum(1 for d in docs if term in d)
+        if not df:
+            continue
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for i, d in enumerate(docs):
+            tf = d.get(term)
+            if tf:
+                scores[i] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[i] / avgdl))
+    return scores
+
+
+def coverage(query: str, passages: Sequence[str], k: int = 3) -> float:
+    """ Share of the query's terms found in its `k` best-scoring BM25 passages """
+    terms = set(tokenize(query))
+    if not terms or not passages:
+        return 0.0
+    scores = bm25_scores(query, passages)
+    top = sorted(range(len(passages)), key=scores.__getitem__, reverse=True)[:k]
+    found = set().union(*(tokenize(passages[i]) for i in top))
+    return len(terms & found) / len(terms)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence], key: Callable = lambda item: item, k: int = 60,
+                           top_k: Optional[int] = None) -> list:
+    """
+    Fuse several ranked lists: each item scores sum(1 / (k + rank)) over the lists it
+    appears in. Items sharing a key are merged (the first occurrence is kept).
+    """
+    scores, items = {}, {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            item_key = key(item)
+            scores[item_key] = scores.get(item_key, 0.0) + 1.0 / (k + rank)
+            items.setdefault(item_key, item)
+    fused = sorted(scores, key=scores.get, reverse=True)
+    return [items[item_key] for item_key in fused[:top_k]]
@@ -0,0 +1,119 @@
+import os
+import statistics
+import threading
+from typing import Optional
+
+from .text_scoring import tokenize
+
+PLANNING = "planning"
+REDUCE = "reduce"
+
+
+def turn_novelty(new_context: list, old_context: list) -> float:
+    """ Share of distinct terms in this turn's retrieved context not seen earlier in the interview """
+    new_terms = set(tokenize(" ".join(new_context)))
+    if not new_terms:
+        return 0.0
+    old_terms = set(tokenize(" ".join(old_context)))
+    return len(new_terms - old_terms) / len(new_terms)
+
+
+class TokenLedger:
+    """
+    Live per-run token ledger and interview turn scheduler.
+
+    Every LLM call is charged to a bucket: an analyst's role during interviews,
+    otherwise "planning" or "reduce". With a budget set, `reduce_reserve` of it is
+    held back for the report writers and interview turns are granted from the rest:
+    every analyst gets `min_turns`, further turns (up to `max_turns`) go to analysts
+    whose last turn found at least the median novelty across the run, and analysts
+    whose last turn fell below `min_novelty` are cut off.
+    """
+
+    def __init__(self, thread_id: str):
+        self.thread_id = thread_id
+        self.budget: Optional[int] = None
+        self.reduce_reserve = float(os.environ.get("RUN_TOKEN_RESERVE", 0.2))
+        self.min_turns = int(os.environ.get("INTERVIEW_MIN_TURNS", 1))
+        self.max_turns = int(os.environ.get("INTERVIEW_MAX_TURNS", 4))
+        self.min_novelty = float(os.environ.get("INTERVIEW_MIN_NOVELTY", 0.2))
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def set_budget(self, tokens: Optional[int]):
+        """ Set the run's token ceiling; the first call wins """
+        if tokens and self.budget is None:
+            self.budget = int(tokens)
+
+    def _bucket(self, name: str) -> dict:
+        if name not in self._buckets:
+            self._buckets[name] = {"input_tokens": 0, "output_tokens": 0, "calls": 0, "turns": 0, "novelty": []}
+        return self._buckets[name]
+
+    def record(self, bucket: str, message):
+        """ Charge one model response (its usage_metadata) to `bucket` """
+        usage = getattr(message, "usage_metadata", None) or {}
+        with self._lock:
+            entry = self._bucket(bucket)
+            entry["input_tokens"] += usage.get("input_tokens", 0)
+            entry["output_tokens"] += usage.get("output_tokens", 0)
+            entry["calls"] += 1
+
+    def record_turn(self, analyst: str, novelty: float):
+        with self._lock:
+            entry = self._bucket(analyst)
+            entry["turns"] += 1
+            entry["novelty"].append(round(novelty, 3))
+
+    def merge(self, bucket: str, usage: dict):
+        """ Fold in a bucket recorded by another process (e.g. an interview worker) """
+        with self._lock:
+            entry = self._bucket(bucket)
+            for key in ("input_tokens", "output_tokens", "calls", "turns"):
+                entry[key] += usage.get(key, 0)
+            entry["novelty"].extend(usage.get("novelty", []))
+
+    def _spent(self, exclude: Optional[str] = None) -> int:
+        return sum(b["input_tokens"] + b["output_tokens"] for name, b in self._buckets.items() if name != exclude)
+
+    @property
+    def spent(self) -> int:
+        with self._lock:
+            return self._spent()
+
+    def exhausted(self) -> bool:
+        """ True once the whole budget, reserve included, is spent """
+        return self.budget is not None and self.spent >= self.budget
+
+    def grant_turn(self, analyst: str, turns_done: int, default_turns: int) -> bool:
+        """ Whether `analyst` may ask another question after `turns_done` answered turns """
+        if self.budget is None:
+            return turns_done < default_turns
+        with self._lock:
+            entry = self._buckets.get(analyst)
+            if turns_done < self.min_turns or entry is None:
+                return turns_done < max(self.min_turns, 1)
+            if turns_done >= self.max_turns:
+                return False
+
+            interview_budget = self.budget * (1 - self.reduce_reserve)
+            interview_spent = self._spent(exclude=REDUCE)
+            per_turn = (entry["input_tokens"] + entry["output_tokens"]) / max(entry["turns"], 1)
+            if interview_spent + per_turn > interview_budget:
+                return False
+
+            last = entry["novelty"][-1] if entry["novelty"] else 0.0
+            if last < self.min_novelty:
+                return False
+            latest = [b["novelty"][-1] for b in self._buckets.values() if b["novelty"]]
+            return last >= statistics.median(latest)
+
+    def snapshot(self) -> dict:
+        """ JSON-friendly view of the ledger for progress events and the UI """
+        with self._lock:
+            buckets = {
+                name: {**entry, "total_tokens": entry["input_tokens"] + entry["output_tokens"], "novelty": list(entry["novelty"])}
+                for name, entry in self._buckets.items()
+            }
+            spent = self._spent()
+        return {"budget": self.budget, "spent": spent, "buckets": buckets}
@@ -0,0 +1,105 @@
+"""
+Scaling benchmark for large interview fan-outs: peak RSS and wall time of one research
+run as the analyst count grows, all-at-once Send fan-out vs. the sliding window.
+
+    python scripts/bench_fanout.py                       # 10, 25, 50, 100 analysts; window 8
+    python scripts/bench_fanout.py --analysts 20 80 --window 4 --latency 0.05
+
+Every case runs in a fresh interpreter against a synthetic model and search backend
+(fixed latency, realistically sized responses), so the numbers measure the
+orchestration itself, not a provider. Peak RSS is reported above the post-import baseline.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child interpreter; CASE is a JSON dict of analysts/latency/doc_kb
+CHILD = r"""
+import json, os, re, resource, sys, time
+case = json.loads(sys.argv[1])
+os.environ.update(MODEL="synthetic", OPENAI_BASE="http://127.0.0.1:9/v1", NOVITA_API_KEY="x", TAVILY_API_KEY="x")
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage
+import core.interview_builder as interview_builder
+import core.llm as llm
+from core.research_agent import ResearchAgent
+
+filler = "Synthetic evidence sentence about the research topic. " * (case["doc_kb"] * 1024 // 55)
+
+class SyntheticModel:
+    def invoke(self, messages, *args, **kwargs):
+        time.sleep(case["latency"])
+        prompt = messages[0].content
+        usage = {"input_tokens": len(prompt) // 4, "output_tokens": 300, "total_tokens": len(prompt) // 4 + 300}
+        if "Research Director" in prompt:
+            n = int(re.search(r"top (\d+) most relevant", prompt).group(1))
+            analysts = [{"role": f"Analyst {i}", "description": f"Covers facet {i} of the topic."} for i in range(n)]
+            return AIMessage(content=json.dumps({"analysts": analysts}), usage_metadata=usage)
+        if "Search Optimization" in prompt:
+            return AIMessage(content=json.dumps({"search_query": "synthetic query"}), usage_metadata=usage)
+        return AIMessage(content="## Findings\n" + "Synthetic analysis paragraph. " * 60, usage_metadata=usage)
+
+class SyntheticWeb:
+    def invoke(self, query, *args, **kwargs):
+        time.sleep(case["latency"])
+        return [{"url": f"https://example.com/{i}", "title": f"Result {i}", "content": filler} for i in range(3)]
+
+class SyntheticWikipedia:
+    def load(self, query, load_max_docs=2, **kwargs):
+        time.sleep(case["latency"])
+        return [Document(page_content=filler, metadata={"source": f"https://en.wikipedia.org/wiki/{i}", "title": f"Article {i}"})
+                for i in range(load_max_docs)]
+
+interview_builder.apply_jitter = lambda *args, **kwargs: None
+llm.ModelRouter.for_profile = lambda self, profile: SyntheticModel()
+
+agent = ResearchAgent("Synthetic template")
+agent.interview_builder.tavily_search = SyntheticWeb()
+agent.interview_builder.wikipedia = SyntheticWikipedia()
+graph = agent.build()
+thread = {"configurable": {"thread_id": "bench"}, "recursion_limit": 100}
+graph.invoke({"topic": "Synthetic topic", "max_analysts": case["analysts"]}, thread)
+graph.update_state(thread, {"human_analyst_feedback": None}, as_node="human_feedback")
+
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+started = time.perf_counter()
+result = graph.invoke(None, thread)
+elapsed = time.perf_counter() - started
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": elapsed, "peak_mb": peak / 1024, "delta_mb": (peak - baseline) / 1024,
+                  "sections": len(result.get("sections", []))}))
+"""
+
+
+def run_case(analysts, window, latency, doc_kb):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1", INTERVIEW_MAX_IN_FLIGHT=str(window),
+               RESEARCH_MEMORY="", CASSETTE_MODE="", INTERVIEW_QUEUE="", SPECULATIVE_INTERVIEWS="0")
+    case = json.dumps({"analysts": analysts, "latency": latency, "doc_kb": doc_kb})
+    result = subprocess.run([sys.executable, "-c", CHILD, case], cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{analysts} analysts (window {window}) failed:\n{result.stderr.strip()[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--analysts", type=int, nargs="+", default=[10, 25, 50, 100])
+    parser.add_argument("--window", type=int, default=8, help="INTERVIEW_MAX_IN_FLIGHT for the windowed runs")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds per synthetic model/search call")
+    parser.add_argument("--doc-kb", type=int, default=8, help="Size of each synthetic search document")
+    args = parser.parse_args()
+
+    print(f"{'analysts':>8}  {'mode':<10} {'wall s':>8} {'peak MB':>8} {'+MB run':>8} {'sections':>8}")
+    for analysts in args.analysts:
+        for label, window in (("send", 0), (f"window={args.window}", args.window)):
+            r = run_case(analysts, window, args.latency, args.doc_kb)
+            print(f"{analysts:>8}  {label:<10} {r['seconds']:>8.2f} {r['peak_mb']:>8.1f} {r['delta_mb']:>8.1f} {r['sections']:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
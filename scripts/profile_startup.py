@@ -0,0 +1,102 @@
+"""
+Import-time profile and cold-start benchmark for the app and core package.
+
+    python scripts/profile_startup.py profile [modules...] [--top 15]
+    python scripts/profile_startup.py bench [modules...] [--runs 7] [--max-seconds 1.5]
+
+`profile` runs each module's import under `python -X importtime` in a fresh
+interpreter and lists the slowest modules by cumulative import time.
+`bench` times the import in fresh interpreters and reports min/median; with
+--max-seconds it exits non-zero when a median exceeds the limit, so it can be used
+as a regression gate.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What the Streamlit script and a service worker import before doing any work
+DEFAULT_TARGETS = [
+    "core.env",
+    "core.document_generator",
+    "core.jobs",
+    "core.run_control",
+    "service",
+    "core.research_agent",
+]
+
+
+def _python(code, *flags):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=ROOT, env=env,
+                          capture_output=True, text=True)
+
+
+def import_times(module):
+    """ (self_us, cumulative_us, name) for every module imported by `import module` """
+    result = _python(f"import {module}", "-X", "importtime")
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+
+def cold_import_seconds(module):
+    """ Seconds to import `module` in a fresh interpreter, excluding interpreter startup """
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = _python(code)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def profile(modules, top):
+    for module in modules:
+        rows = import_times(module)
+        total = next((c for _, c, name in rows if name.strip() == module), sum(s for s, _, _ in rows))
+        print(f"\n{module}: {total / 1e6:.3f}s cumulative, {len(rows)} modules")
+        print(f"  {'cumulative':>10}  {'self':>8}  module")
+        for self_us, cumulative_us, name in sorted(rows, key=lambda r: r[1], reverse=True)[:top]:
+            print(f"  {cumulative_us / 1e6:>9.3f}s  {self_us / 1e6:>7.3f}s  {name}")
+
+
+def bench(modules, runs, max_seconds):
+    failed = []
+    print(f"{'module':<28} {'min':>8} {'median':>8}  ({runs} cold runs)")
+    for module in modules:
+        samples = [cold_import_seconds(module) for _ in range(runs)]
+        median = statistics.median(samples)
+        print(f"{module:<28} {min(samples):>7.3f}s {median:>7.3f}s")
+        if max_seconds is not None and median > max_seconds:
+            failed.append(module)
+    if failed:
+        print(f"\nOver the {max_seconds}s cold-start limit: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=["profile", "bench"])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument("--top", type=int, default=15, help="Modules listed per target in profile mode")
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters per target in bench mode")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fail bench when a median exceeds this")
+    args = parser.parse_args()
+
+    if args.mode == "profile":
+        profile(args.modules, args.top)
+        return 0
+    return bench(args.modules, args.runs, args.max_seconds)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,474 @@
+"""
+HTTP job API for the research engine.
+
+    python service.py --port 8000 --workers 4
+
+Endpoints:
+    POST /jobs                          {"topic": ..., "max_analysts": 3, "template": optional} -> 202 {"job_id": ...}
+    GET  /jobs/{id}                     job status
+    GET  /jobs/{id}/analysts            proposed analysts (available once status is awaiting_feedback)
+    POST /jobs/{id}/approve             proceed with the current analysts
+    POST /jobs/{id}/feedback            {"feedback": "..."} regenerate analysts with editorial feedback
+                                        (on a completed job: revise it; unchanged analysts keep their interviews)
+    POST /jobs/{id}/refresh             re-check a completed job's searches; re-interview only analysts whose
+                                        results changed and rewrite the report only then
+    POST /jobs/{id}/cancel              stop the interviews and write a partial report from finished sections
+    GET  /jobs/{id}/events              progress, finished sections (pool mode) and per-analyst token ledger as
+                                        Server-Sent Events (resumable with Last-Event-ID)
+    GET  /jobs/{id}/artifacts/{name}    report.md, report.docx or report.pptx
+    GET  /stats/latency                 per-node latency and hedging stats (this worker process)
+    GET  /stats/pool                    shared HTTP pool: open/idle connections and per-host request counters
+                                        (this worker process)
+
+Worker processes share one listening socket plus one SQLite database holding the
+LangGraph checkpoints and job events, so any worker can serve any request for any job.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import socket
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from core.env import load_env
+
+load_env()
+
+from core import job_store
+from core.job_store import JobStore
+from core.jobs import JobRejected, JobExecutor
+from core.hedging import latency_stats
+from core.http_pool import pool_stats
+from core.run_control import cancel_run, peek_run_control
+
+ARTIFACT_TYPES = {
+    "report.md": "text/markdown; charset=utf-8",
+    "report.docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "report.pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+}
+
+
+class ResearchService:
+    """ Per-process service state: job store, durable checkpointer, compiled graphs and a job executor """
+
+    def __init__(self, db_path: str, artifacts_dir: str, job_workers: int):
+        try:
+            from langgraph.checkpoint.sqlite import SqliteSaver
+        except ImportError as e:
+            raise RuntimeError("service.py needs the 'langgraph-checkpoint-sqlite' package") from e
+
+        self.store = JobStore(db_path)
+        conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        self.checkpointer = SqliteSaver(conn)
+        self.checkpointer.setup()
+        self.artifacts_dir = artifacts_dir
+        self.executor = JobExecutor(max_workers=job_workers, max_per_session=job_workers * 4)
+        self._graphs = {}
+        self._graphs_lock = threading.Lock()
+
+    def compiled(self, job):
+        """ (ResearchAgent, compiled graph) for the job's template, built once per process """
+        from core.prompts import template as default_template
+        from core.research_agent import ResearchAgent
+
+        template = job["template"] or default_template
+        with self._graphs_lock:
+            if template not in self._graphs:
+                agent = ResearchAgent(template)
+                self._graphs[template] = (agent, agent.build(checkpointer=self.checkpointer))
+            return self._graphs[template]
+
+    def graph_for(self, job):
+        return self.compiled(job)[1]
+
+    def thread_config(self, job):
+        return {"configurable": {"thread_id": job["thread_id"]}}
+
+    def state(self, job):
+        return self.graph_for(job).get_state(self.thread_config(job))
+
+    # --- job execution (runs on the executor) ---
+
+    def _stream(self, job, graph_input):
+        graph = self.graph_for(job)
+        for namespace, mode, update in graph.stream(graph_input, self.thread_config(job), stream_mode=["updates", "custom"], subgraphs=True):
+            if mode == "custom":
+                # Pool mode streams each finished interview as it lands
+                if isinstance(update, dict) and "section" in update:
+                    self.store.add_event(job["job_id"], "section", update["section"])
+                continue
+            for node, values in (update or {}).items():
+                if node.startswith("__"):
+                    continue
+                event = {"node": node}
+                if namespace:
+                    event["namespace"] = "|".join(namespace)
+                if node in ("conduct_interview", "conduct_interviews") and isinstance(values, dict):
+                    event["sections"] = len(values.get("sections", []))
+                self.store.add_event(job["job_id"], "node", event)
+                control = peek_run_control(job["thread_id"])
+                if control is not None:
+                    self.store.add_event(job["job_id"], "budget", control.ledger.snapshot())
+
+    def _finish_step(self, job):
+        snapshot = self.state(job)
+        if "human_feedback" in (snapshot.next or ()):
+            analysts = [a.model_dump() for a in snapshot.values.get("analysts", [])]
+            self.store.add_event(job["job_id"], "analysts", {"analysts": analysts})
+            self.store.set_status(job["job_id"], job_store.AWAITING_FEEDBACK)
+        else:
+            if snapshot.values.get("token_usage"):
+                self.store.add_event(job["job_id"], "budget", snapshot.values["token_usage"])
+            self.store.add_event(job["job_id"], "report", {"artifacts": list(ARTIFACT_TYPES)})
+            self.store.set_status(job["job_id"], job_store.COMPLETED)
+
+    def _watch_cancel(self, job, done: threading.Event, since: int):
+        """
+        Cancel requests may land on any worker process, so the running worker polls the store.
+        Only cancels after event `since` count; an earlier run's cancel must not stop this one
+        """
+        while not done.wait(1.0):
+            if self.store.has_event(job["job_id"], "cancel", after_id=since):
+                cancel_run(job["thread_id"], "cancelled by request")
+                return
+
+    def _run(self, job, graph_input, as_feedback=None, since=None):
+        done = threading.Event()
+        since = self.store.last_event_id(job["job_id"]) if since is None else since
+        threading.Thread(target=self._watch_cancel, args=(job, done, since), daemon=True).start()
+        try:
+            if as_feedback is not None:
+                self.graph_for(job).update_state(
+                    self.thread_config(job),
+                    {"human_analyst_feedback": as_feedback or None},
+                    as_node="human_feedback",
+                )
+            self._stream(job, graph_input)
+            self._finish_step(job)
+        except Exception as e:
+            print(f"[ERROR] service job {job['job_id']} failed: {e}")
+            self.store.set_status(job["job_id"], job_store.FAILED, error=str(e))
+        finally:
+            done.set()
+
+    def submit(self, topic, max_analysts, template=None):
+        job = self.store.create(topic, max_analysts, template)
+        self.store.set_status(job["job_id"], job_store.CREATING_ANALYSTS)
+        try:
+            self.executor.submit(job["job_id"], self._run, job, {"topic": topic, "max_analysts": max_analysts})
+        except JobRejected as e:
+            self.store.set_status(job["job_id"], job_store.FAILED, error=str(e))
+            raise
+        return self.store.get(job["job_id"])
+
+    def resume(self, job, feedback):
+        """
+        Approve (feedback is None) or send feedback; only one request wins the transition.
+        Feedback on a completed job revises its analysts; unchanged ones keep their interviews.
+        """
+        next_status = job_store.CREATING_ANALYSTS if feedback else job_store.RUNNING
+        from_status = job_store.COMPLETED if feedback and job["status"] == job_store.COMPLETED else job_store.AWAITING_FEEDBACK
+        # Marked before the claim, so a cancel sent while the job waits for an executor slot still counts
+        since = self.store.last_event_id(job["job_id"])
+        if not self.store.claim(job["job_id"], from_status, next_status):
+            return False
+        try:
+            self.executor.submit(job["job_id"], self._run, job, None, as_feedback=feedback or "", since=since)
+        except JobRejected:
+            self.store.set_status(job["job_id"], from_status)
+            raise
+        return True
+
+    def _refresh(self, job, since):
+        from core.refresh import prepare_refresh
+
+        try:
+            agent, graph = self.compiled(job)
+            plan = prepare_refresh(graph, agent.interview_builder, self.thread_config(job))
+        except Exception as e:
+            print(f"[ERROR] service refresh of job {job['job_id']} failed: {e}")
+            self.store.add_event(job["job_id"], "refresh", {"error": str(e)})
+            self.store.set_status(job["job_id"], job_store.COMPLETED)
+            return
+        self.store.add_event(job["job_id"], "refresh", {**plan, "changed": sorted(plan["changed"].values())})
+        if plan["changed"]:
+            self._run(job, None, since=since)
+        else:
+            self.store.set_status(job["job_id"], job_store.COMPLETED)
+
+    def refresh(self, job):
+        """ Re-check a completed job's evidence in the background; False unless the job is completed """
+        since = self.store.last_event_id(job["job_id"])
+        if not self.store.claim(job["job_id"], job_store.COMPLETED, job_store.RUNNING):
+            return False
+        try:
+            self.executor.submit(job["job_id"], self._refresh, job, since)
+        except JobRejected:
+            self.store.set_status(job["job_id"], job_store.COMPLETED)
+            raise
+        return True
+
+    def cancel(self, job):
+        """ Only running jobs can be cancelled; the report is still written from finished sections """
+        if job["status"] != job_store.RUNNING:
+            return False
+        self.store.add_event(job["job_id"], "cancel", {})
+        return True
+
+    def artifact(self, job, name):
+        report = self.state(job).values.get("final_report")
+        if not report:
+            return None
+        if name == "report.md":
+            return report.encode("utf-8")
+
+        from core.document_generator import Generator
+
+        output_dir = os.path.join(self.artifacts_dir, job["job_id"])
+        os.makedirs(output_dir, exist_ok=True)
+        generator = Generator(output_dir=output_dir)
+        path = generator.generate_doc(report) if name == "report.docx" else generator.generate_pptx(report)
+        with open(path, "rb") as f:
+            return f.read()
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    server_version = "DeepResearchService/1.0"
+
+    ROUTES = [
+        ("POST", re.compile(r"^/jobs$"), "create_job"),
+        ("GET", re.compile(r"^/jobs/(\w+)$"), "get_job"),
+        ("GET", re.compile(r"^/jobs/(\w+)/analysts$"), "get_analysts"),
+        ("POST", re.compile(r"^/jobs/(\w+)/approve$"), "approve"),
+        ("POST", re.compile(r"^/jobs/(\w+)/feedback$"), "feedback"),
+        ("POST", re.compile(r"^/jobs/(\w+)/refresh$"), "refresh"),
+        ("POST", re.compile(r"^/jobs/(\w+)/cancel$"), "cancel"),
+        ("GET", re.compile(r"^/jobs/(\w+)/events$"), "events"),
+        ("GET", re.compile(r"^/jobs/(\w+)/artifacts/([\w.]+)$"), "get_artifact"),
+        ("GET", re.compile(r"^/stats/latency$"), "get_latency_stats"),
+        ("GET", re.compile(r"^/stats/pool$"), "get_pool_stats"),
+    ]
+
+    @property
+    def service(self) -> ResearchService:
+        return self.server.service
+
+    def log_message(self, format, *args):
+        print(f"[DEBUG] service[{os.getpid()}] {self.address_string()} {format % args}")
+
+    def _dispatch(self, method):
+        path = urlparse(self.path).path
+        for route_method, pattern, handler in self.ROUTES:
+            match = pattern.match(path)
+            if match and route_method == method:
+                try:
+                    return getattr(self, handler)(*match.groups())
+                except JobRejected as e:
+                    return self._json(429, {"error": str(e)})
+                except Exception as e:
+                    print(f"[ERROR] {method} {path} failed: {e}")
+                    return self._json(500, {"error": str(e)})
+        self._json(404, {"error": f"No route for {method} {path}"})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _json(self, status, body):
+        payload = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _job(self, job_id):
+        job = self.service.store.get(job_id)
+        if job is None:
+            self._json(404, {"error": f"Unknown job {job_id}"})
+        return job
+
+    @staticmethod
+    def _public(job):
+        return {k: v for k, v in job.items() if k != "template"}
+
+    # --- routes ---
+
+    def create_job(self):
+        body = self._body()
+        topic = (body.get("topic") or "").strip()
+        if not topic:
+            return self._json(400, {"error": "'topic' is required"})
+        job = self.service.submit(topic, int(body.get("max_analysts", 3)), body.get("template"))
+        self._json(202, self._public(job))
+
+    def get_job(self, job_id):
+        job = self._job(job_id)
+        if job:
+            self._json(200, self._public(job))
+
+    def get_analysts(self, job_id):
+        job = self._job(job_id)
+        if not job:
+            return
+        analysts = self.service.state(job).values.get("analysts")
+        if not analysts:
+            return self._json(409, {"error": "Analysts are not ready yet", "status": job["status"]})
+        self._json(200, {"status": job["status"], "analysts": [a.model_dump() for a in analysts]})
+
+    def _resume(self, job_id, feedback):
+        job = self._job(job_id)
+        if not job:
+            return
+        if not self.service.resume(job, feedback):
+            return self._json(409, {"error": "Job is not awaiting analyst feedback", "status": job["status"]})
+        self._json(202, self._public(self.service.store.get(job_id)))
+
+    def approve(self, job_id):
+        self._resume(job_id, None)
+
+    def feedback(self, job_id):
+        feedback = (self._body().get("feedback") or "").strip()
+        if not feedback:
+            return self._json(400, {"error": "'feedback' is required; use /approve to proceed without feedback"})
+        self._resume(job_id, feedback)
+
+    def refresh(self, job_id):
+        job = self._job(job_id)
+        if not job:
+            return
+        if not self.service.refresh(job):
+            return self._json(409, {"error": "Only completed jobs can be refreshed", "status": job["status"]})
+        self._json(202, self._public(self.service.store.get(job_id)))
+
+    def cancel(self, job_id):
+        job = self._job(job_id)
+        if not job:
+            return
+        if not self.service.cancel(job):
+            return self._json(409, {"error": "Only running jobs can be cancelled", "status": job["status"]})
+        self._json(202, self._public(job))
+
+    def events(self, job_id):
+        job = self._job(job_id)
+        if not job:
+            return
+        query = parse_qs(urlparse(self.path).query)
+        last_id = int(self.headers.get("Last-Event-ID") or query.get("after", [0])[0])
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        last_write = time.time()
+        try:
+            while True:
+                events = self.service.store.events_after(job_id, last_id)
+                for event in events:
+                    last_id = event["event_id"]
+                    self.wfile.write(f"id: {last_id}\nevent: {event['event']}\ndata: {event['data']}\n\n".encode("utf-8"))
+                if events:
+                    self.wfile.flush()
+                    last_write = time.time()
+                    continue
+                if self.service.store.get(job_id)["status"] in job_store.PAUSED_STATES:
+                    break
+                if time.time() - last_write > 15:
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    last_write = time.time()
+                time.sleep(0.5)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def get_artifact(self, job_id, name):
+        job = self._job(job_id)
+        if not job:
+            return
+        if name not in ARTIFACT_TYPES:
+            return self._json(404, {"error": f"Unknown artifact {name}", "available": list(ARTIFACT_TYPES)})
+        data = self.service.artifact(job, name)
+        if data is None:
+            return self._json(409, {"error": "Report is not ready yet", "status": job["status"]})
+        self.send_response(200)
+        self.send_header("Content-Type", ARTIFACT_TYPES[name])
+        self.send_header("Content-Disposition", f'attachment; filename="DeepResearch_{name}"')
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def get_latency_stats(self):
+        # Per worker process: each worker tracks the calls of the jobs it runs
+        self._json(200, {"pid": os.getpid(), "nodes": latency_stats()})
+
+    def get_pool_stats(self):
+        # Per worker process: each worker has its own shared HTTP client
+        self._json(200, {"pid": os.getpid(), **pool_stats()})
+
+
+def _serve_on(sock, args):
+    """ Worker process entry: build per-process state and serve the shared socket """
+    server = ThreadingHTTPServer(sock.getsockname()[:2], ServiceHandler, bind_and_activate=False)
+    server.socket = sock
+    server.daemon_threads = True
+    server.service = ResearchService(args.db, args.artifacts, args.job_workers)
+    print(f"[DEBUG] service worker {os.getpid()} ready")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DeepResearch HTTP job service")
+    parser.add_argument("--host", default=os.environ.get("SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("SERVICE_PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("SERVICE_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--job-workers", type=int, default=int(os.environ.get("SERVICE_JOB_WORKERS", 4)),
+                        help="Concurrent research runs per worker process")
+    parser.add_argument("--db", default=os.environ.get("SERVICE_DB", "service_data/research.sqlite"))
+    parser.add_argument("--artifacts", default=os.environ.get("SERVICE_ARTIFACTS", "service_data/artifacts"))
+    parser.add_argument("--no-preload", dest="preload", action="store_false",
+                        default=os.environ.get("SERVICE_PRELOAD", "1") != "0",
+                        help="Don't import the research graph before forking workers")
+    args = parser.parse_args()
+
+    # Create the schema once before forking so workers never race on it
+    JobStore(args.db)
+    if args.preload:
+        # Import the graph stack once; forked workers inherit it instead of paying for it on their first job
+        import core.research_agent  # noqa: F401
+    sock = socket.create_server((args.host, args.port), backlog=256)
+    print(f"[DEBUG] DeepResearch service listening on http://{args.host}:{args.port} with {args.workers} worker(s)")
+
+    if args.workers <= 1 or not hasattr(os, "fork"):
+        _serve_on(sock, args)
+        return
+
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_serve_on, args=(sock, args), daemon=True) for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+
+
+if __name__ == "__main__":
+    main()